@@ -0,0 +1,46 @@
+"""
+Compteurs de diffusions par jour, tenus dans le cache partagé.
+
+Incrémentés à l'ingestion des logs (log_event / log_events) : le tableau de
+bord lit un entier au lieu de compter les ScreenLog du jour. Le compteur est
+atomique avec Redis ; avec le cache fichier, deux écritures simultanées
+peuvent se recouvrir (valeur indicative).
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+PLAY_COUNTER_PREFIX = 'analytics:plays'
+# Conservé au-delà de la journée pour les logs envoyés en différé
+PLAY_COUNTER_TIMEOUT = 3 * 24 * 3600
+
+
+def is_play(action):
+    return action in settings.PROOF_OF_PLAY_ACTIONS
+
+
+def _key(day):
+    return f'{PLAY_COUNTER_PREFIX}:{day.isoformat()}'
+
+
+def record_plays(logs):
+    """Ajoute aux compteurs journaliers les diffusions parmi les logs donnés"""
+    days = Counter(timezone.localdate(log.timestamp) for log in logs if is_play(log.action))
+    for day, count in days.items():
+        key = _key(day)
+        cache.add(key, 0, PLAY_COUNTER_TIMEOUT)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            # Clé expirée entre add et incr
+            cache.set(key, count, PLAY_COUNTER_TIMEOUT)
+
+
+def plays_on(day):
+    return cache.get(_key(day), 0)
+
+
+def plays_today():
+    return plays_on(timezone.localdate())
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.analytics import rollups
+
+
+class Command(BaseCommand):
+    help = ("Agrège les nouveaux logs de diffusion (ScreenLog) en agrégats horaires et journaliers "
+            "par contenu, écran et playlist ; à lancer périodiquement (cron)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=rollups.BATCH_SIZE,
+                            help="Logs traités par transaction")
+        parser.add_argument('--lag', type=int, default=None,
+                            help="Âge minimal (secondes) des logs observés avant agrégation "
+                                 "(défaut : ROLLUP_SAFETY_LAG)")
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Supprime les agrégats et recalcule depuis le premier log "
+                                 "(après un changement de PROOF_OF_PLAY_ACTIONS)")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rollups.reset_rollups()
+            self.stdout.write("Agrégats supprimés ; les logs observés maintenant sont agrégés "
+                              "au passage suivant (--lag 0 pour tout agréger tout de suite)")
+
+        start = time.monotonic()
+        processed = rollups.run_rollup(batch_size=options['batch_size'], lag=options['lag'])
+        state = rollups.rollup_state()
+        self.stdout.write(self.style.SUCCESS(
+            f"{processed} diffusion(s) agrégée(s) en {time.monotonic() - start:.1f}s, "
+            f"point de reprise : log {state.last_log_id if state else 0}"
+        ))
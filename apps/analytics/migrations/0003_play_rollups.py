@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_screenlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_log_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlayRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Heure'), ('day', 'Jour')], max_length=8, verbose_name='Période')),
+                ('dimension', models.CharField(choices=[('content', 'Contenu'), ('screen', 'Écran'), ('playlist', 'Playlist')], max_length=16, verbose_name='Dimension')),
+                ('object_id', models.UUIDField(verbose_name='Objet')),
+                ('bucket', models.DateTimeField(verbose_name='Début de période')),
+                ('plays', models.PositiveIntegerField(default=0, verbose_name='Diffusions')),
+                ('play_seconds', models.FloatField(default=0, verbose_name='Durée de diffusion (s)')),
+            ],
+            options={
+                'verbose_name': 'Agrégat de diffusions',
+                'verbose_name_plural': 'Agrégats de diffusions',
+                'indexes': [models.Index(fields=['period', 'dimension', 'bucket'], name='play_rollup_bucket_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='playrollup',
+            constraint=models.UniqueConstraint(fields=('period', 'dimension', 'object_id', 'bucket'), name='play_rollup_unique'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from apps.screens.models import Screen
 from apps.content.models import Content
 
@@ -8,7 +9,7 @@ class ScreenLog(models.Model):
     content = models.ForeignKey(Content, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Contenu")
     action = models.CharField(max_length=50, verbose_name="Action")
     details = models.JSONField(default=dict, blank=True, verbose_name="Détails")
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Horodatage")
+    timestamp = models.DateTimeField(default=timezone.now, verbose_name="Horodatage")
     
     class Meta:
         ordering = ['-timestamp']
@@ -21,3 +22,52 @@ class ScreenLog(models.Model):
     
     def __str__(self):
         return f"{self.screen.name} - {self.action} - {self.timestamp}"
+
+
+class RollupPeriod(models.TextChoices):
+    HOUR = 'hour', 'Heure'
+    DAY = 'day', 'Jour'
+
+
+class RollupDimension(models.TextChoices):
+    CONTENT = 'content', 'Contenu'
+    SCREEN = 'screen', 'Écran'
+    PLAYLIST = 'playlist', 'Playlist'
+
+
+class PlayRollup(models.Model):
+    """Diffusions agrégées par heure ou par jour pour un contenu, un écran ou une playlist"""
+    period = models.CharField(max_length=8, choices=RollupPeriod.choices, verbose_name="Période")
+    dimension = models.CharField(max_length=16, choices=RollupDimension.choices, verbose_name="Dimension")
+    # Identifiant du contenu, de l'écran ou de la playlist (conservé après suppression)
+    object_id = models.UUIDField(verbose_name="Objet")
+    bucket = models.DateTimeField(verbose_name="Début de période")
+    plays = models.PositiveIntegerField(default=0, verbose_name="Diffusions")
+    play_seconds = models.FloatField(default=0, verbose_name="Durée de diffusion (s)")
+
+    class Meta:
+        verbose_name = "Agrégat de diffusions"
+        verbose_name_plural = "Agrégats de diffusions"
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'dimension', 'object_id', 'bucket'],
+                                    name='play_rollup_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['period', 'dimension', 'bucket'], name='play_rollup_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension} {self.object_id} - {self.period} {self.bucket}: {self.plays}"
+
+
+class RollupState(models.Model):
+    """Point de reprise d'un agrégat : dernier ScreenLog pris en compte"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_log_id = models.BigIntegerField(default=0)
+    # Plus grand id observé et date de l'observation (borne du prochain passage, voir rollups.py)
+    horizon_log_id = models.BigIntegerField(default=0)
+    horizon_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_log_id}"
@@ -0,0 +1,62 @@
+"""
+Pagination par curseur (keyset) des logs d'écrans sur (timestamp, id).
+
+Le coût d'une page profonde est le même que celui de la première page :
+la requête repart de la position du curseur via l'index
+['screen', '-timestamp'] au lieu d'un OFFSET.
+"""
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import CursorPagination
+
+
+class ScreenLogCursorPagination(CursorPagination):
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    ordering = ('-timestamp', '-id')
+
+
+def encode_cursor(log):
+    value = f'{log.timestamp.isoformat()}|{log.pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Retourne (timestamp, id) ou None si le curseur est invalide"""
+    try:
+        timestamp, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        timestamp = parse_datetime(timestamp)
+        return (timestamp, int(pk)) if timestamp else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(logs, after=None, before=None, page_size=50):
+    """Une page de logs (plus récents d'abord) avec les curseurs suivant/précédent"""
+    position = decode_cursor(after or before or '')
+
+    if position and before:
+        timestamp, pk = position
+        rows = list(logs.filter(
+            Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk)
+        ).order_by('timestamp', 'id')[:page_size + 1])
+        has_previous = len(rows) > page_size
+        items = rows[:page_size][::-1]
+        has_next = True
+    else:
+        if position:
+            timestamp, pk = position
+            logs = logs.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+        rows = list(logs.order_by('-timestamp', '-id')[:page_size + 1])
+        has_next = len(rows) > page_size
+        items = rows[:page_size]
+        has_previous = position is not None
+
+    return {
+        'items': items,
+        'next_cursor': encode_cursor(items[-1]) if has_next and items else None,
+        'previous_cursor': encode_cursor(items[0]) if has_previous and items else None,
+    }
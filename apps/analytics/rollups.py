@@ -0,0 +1,257 @@
+"""
+Agrégats de preuve de diffusion (PlayRollup) calculés de façon incrémentale.
+
+run_rollup() lit les ScreenLog de diffusion (PROOF_OF_PLAY_ACTIONS) au-delà
+du point de reprise (RollupState.last_log_id) par lots ordonnés sur id, et
+ajoute diffusions et secondes diffusées aux agrégats horaires et journaliers
+par contenu, par écran et par playlist. Chaque lot est appliqué dans la même
+transaction que l'avancée du point de reprise : un job interrompu reprend
+sans double comptage. Les graphiques lisent PlayRollup, jamais ScreenLog.
+
+L'id d'un log est attribué à l'INSERT mais le log n'est visible qu'au
+commit : le plus grand id visible peut dépasser celui d'une transaction
+encore ouverte, qui serait ensuite sautée par le point de reprise. Le plus
+grand id observé est donc mémorisé (RollupState.horizon_log_id) et ne sert
+de borne qu'une fois vieux de ROLLUP_SAFETY_LAG secondes : les transactions
+ouvertes au moment de l'observation sont commitées depuis. Un passage agrège
+ainsi les logs observés au passage précédent (ou plus tôt).
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from apps.content.models import Content
+from apps.playlists.models import Playlist
+from apps.screens.models import Screen
+from .models import PlayRollup, RollupDimension, RollupPeriod, RollupState, ScreenLog
+
+ROLLUP_STATE = 'play_rollup'
+BATCH_SIZE = 5000
+# Taille des IN (...) lors de la lecture des agrégats existants
+LOOKUP_CHUNK_SIZE = 500
+
+PERIOD_STEPS = {
+    RollupPeriod.HOUR: timedelta(hours=1),
+    RollupPeriod.DAY: timedelta(days=1),
+}
+DIMENSION_MODELS = {
+    RollupDimension.CONTENT: (Content, 'title'),
+    RollupDimension.SCREEN: (Screen, 'name'),
+    RollupDimension.PLAYLIST: (Playlist, 'name'),
+}
+
+
+def buckets(timestamp):
+    """Début de l'heure et du jour (heure locale) contenant timestamp"""
+    hour = timezone.localtime(timestamp).replace(minute=0, second=0, microsecond=0)
+    return {RollupPeriod.HOUR: hour, RollupPeriod.DAY: hour.replace(hour=0)}
+
+
+def _playlist_id(details):
+    value = details.get('playlist_id') if isinstance(details, dict) else None
+    try:
+        return uuid.UUID(str(value)) if value else None
+    except ValueError:
+        return None
+
+
+def _play_seconds(details, content_duration):
+    """Durée envoyée par l'écran (details.duration), sinon durée du contenu"""
+    value = details.get('duration') if isinstance(details, dict) else None
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+        return float(value)
+    return float(content_duration or 0)
+
+
+def aggregate(rows):
+    """{(période, dimension, objet, début): [diffusions, secondes]} pour des logs de diffusion"""
+    totals = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        seconds = _play_seconds(row['details'], row['content__duration'])
+        objects = (
+            (RollupDimension.CONTENT, row['content_id']),
+            (RollupDimension.SCREEN, row['screen_id']),
+            (RollupDimension.PLAYLIST, _playlist_id(row['details'])),
+        )
+        for period, bucket in buckets(row['timestamp']).items():
+            for dimension, object_id in objects:
+                if object_id is None:
+                    continue
+                total = totals[(period, dimension, object_id, bucket)]
+                total[0] += 1
+                total[1] += seconds
+    return totals
+
+
+def merge(totals):
+    """Ajoute les totaux aux agrégats existants, crée les manquants"""
+    by_group = defaultdict(set)
+    for period, dimension, object_id, bucket in totals:
+        by_group[(period, dimension, bucket)].add(object_id)
+
+    existing = {}
+    for (period, dimension, bucket), object_ids in by_group.items():
+        object_ids = list(object_ids)
+        for index in range(0, len(object_ids), LOOKUP_CHUNK_SIZE):
+            for rollup in PlayRollup.objects.filter(
+                period=period, dimension=dimension, bucket=bucket,
+                object_id__in=object_ids[index:index + LOOKUP_CHUNK_SIZE]
+            ):
+                existing[(rollup.period, rollup.dimension, rollup.object_id, rollup.bucket)] = rollup
+
+    to_update, to_create = [], []
+    for key, (plays, seconds) in totals.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            period, dimension, object_id, bucket = key
+            to_create.append(PlayRollup(period=period, dimension=dimension, object_id=object_id,
+                                        bucket=bucket, plays=plays, play_seconds=seconds))
+        else:
+            rollup.plays += plays
+            rollup.play_seconds += seconds
+            to_update.append(rollup)
+
+    PlayRollup.objects.bulk_update(to_update, ['plays', 'play_seconds'], batch_size=500)
+    PlayRollup.objects.bulk_create(to_create, batch_size=500)
+
+
+def _locked_state():
+    RollupState.objects.get_or_create(name=ROLLUP_STATE)
+    return RollupState.objects.select_for_update().get(name=ROLLUP_STATE)
+
+
+def _upper_bound(lag):
+    """Borne des ids à agréger ; mémorise le plus grand id actuel pour un passage suivant"""
+    now = timezone.now()
+    with transaction.atomic():
+        state = _locked_state()
+        current = ScreenLog.objects.aggregate(upper=Max('id'))['upper'] or 0
+        upper = state.last_log_id
+        if lag <= 0:
+            upper = current
+        elif state.horizon_at is not None and state.horizon_at <= now - timedelta(seconds=lag):
+            upper = state.horizon_log_id
+            state.horizon_at = None
+        if state.horizon_at is None:
+            state.horizon_log_id, state.horizon_at = current, now
+            state.save(update_fields=['horizon_log_id', 'horizon_at', 'updated_at'])
+    return upper
+
+
+def run_rollup(batch_size=BATCH_SIZE, lag=None):
+    """
+    Agrège les logs de diffusion postérieurs au point de reprise ; retourne
+    le nombre de logs agrégés. lag : ROLLUP_SAFETY_LAG par défaut, 0 pour
+    agréger jusqu'au dernier log visible (sans garantie pour les transactions
+    encore ouvertes).
+    """
+    if lag is None:
+        lag = getattr(settings, 'ROLLUP_SAFETY_LAG', 60)
+    # Borne fixée au départ : les logs arrivant pendant le job attendent le suivant
+    upper = _upper_bound(lag)
+    processed = 0
+
+    while True:
+        with transaction.atomic():
+            state = _locked_state()
+            if state.last_log_id >= upper:
+                break
+
+            rows = list(ScreenLog.objects.filter(
+                id__gt=state.last_log_id, id__lte=upper, action__in=settings.PROOF_OF_PLAY_ACTIONS
+            ).order_by('id').values(
+                'id', 'screen_id', 'content_id', 'details', 'timestamp', 'content__duration'
+            )[:batch_size])
+
+            merge(aggregate(rows))
+            state.last_log_id = rows[-1]['id'] if len(rows) == batch_size else upper
+            state.save(update_fields=['last_log_id', 'updated_at'])
+        processed += len(rows)
+
+    return processed
+
+
+def reset_rollups():
+    """Supprime les agrégats et remet le point de reprise au début des logs"""
+    with transaction.atomic():
+        PlayRollup.objects.all().delete()
+        RollupState.objects.filter(name=ROLLUP_STATE).delete()
+
+
+def rollup_state():
+    return RollupState.objects.filter(name=ROLLUP_STATE).first()
+
+
+def day_range(start_date, end_date):
+    """Bornes [début, fin) en datetime locales pour des dates incluses"""
+    return (timezone.make_aware(datetime.combine(start_date, time.min)),
+            timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min)))
+
+
+def _bucket_starts(period, start, end):
+    step = PERIOD_STEPS[period]
+    starts = []
+    current = start
+    while current < end:
+        starts.append(current)
+        current = timezone.localtime(current) + step
+    return starts
+
+
+def _points(rows, index):
+    plays = [0] * len(index)
+    seconds = [0.0] * len(index)
+    for row in rows:
+        position = index.get(row['bucket'])
+        if position is not None:
+            plays[position] += row['plays']
+            seconds[position] += row['play_seconds']
+    return {'plays': plays, 'play_seconds': seconds}
+
+
+def play_series(period, dimension, start, end, limit=5):
+    """
+    Séries pour les graphiques : total par période (toutes les diffusions,
+    via la dimension écran) et les `limit` objets les plus diffusés de la dimension.
+    """
+    starts = _bucket_starts(period, start, end)
+    index = {bucket: position for position, bucket in enumerate(starts)}
+    rollups = PlayRollup.objects.filter(period=period, bucket__gte=start, bucket__lt=end)
+
+    # Chaque diffusion a exactement un écran : la dimension écran donne le total
+    totals = _points(rollups.filter(dimension=RollupDimension.SCREEN).values('bucket').annotate(
+        plays=Sum('plays'), play_seconds=Sum('play_seconds')
+    ), index)
+
+    ranked = list(rollups.filter(dimension=dimension).values('object_id').annotate(
+        plays=Sum('plays'), play_seconds=Sum('play_seconds')
+    ).order_by('-plays', 'object_id')[:limit])
+    object_ids = [row['object_id'] for row in ranked]
+
+    per_object = defaultdict(list)
+    for row in rollups.filter(dimension=dimension, object_id__in=object_ids).values(
+        'object_id', 'bucket', 'plays', 'play_seconds'
+    ):
+        per_object[row['object_id']].append(row)
+
+    model, label_field = DIMENSION_MODELS[dimension]
+    labels = dict(model.objects.filter(pk__in=object_ids).values_list('pk', label_field))
+
+    return {
+        'period': period,
+        'dimension': dimension,
+        'buckets': [bucket.isoformat() for bucket in starts],
+        'totals': totals,
+        'series': [{
+            'id': str(row['object_id']),
+            'label': labels.get(row['object_id'], "(supprimé)"),
+            'plays': row['plays'],
+            'play_seconds': row['play_seconds'],
+            'points': _points(per_object[row['object_id']], index),
+        } for row in ranked],
+    }
@@ -0,0 +1,24 @@
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework import serializers
+from .models import ScreenLog
+
+
+class ScreenLogEventSerializer(serializers.Serializer):
+    """Événement envoyé par un écran (horodatage fourni par le client)"""
+    content_id = serializers.UUIDField(required=False, allow_null=True)
+    action = serializers.CharField(max_length=50, default='unknown')
+    details = serializers.JSONField(required=False, default=dict)
+    timestamp = serializers.DateTimeField(required=False)
+
+    def validate_timestamp(self, value):
+        # Tolérance pour les horloges des appareils légèrement en avance
+        if value > timezone.now() + timedelta(minutes=5):
+            raise serializers.ValidationError("Horodatage dans le futur")
+        return value
+
+
+class ScreenLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ScreenLog
+        fields = ['id', 'screen', 'content', 'action', 'details', 'timestamp']
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.content.models import Content
+from apps.playlists.models import Playlist
+from apps.screens.models import Screen
+from . import rollups
+from .models import PlayRollup, RollupDimension, RollupPeriod, ScreenLog
+
+
+class RollupTestCase(TestCase):
+    def setUp(self):
+        self.screen = Screen.objects.create(name="Accueil", location="Hall")
+        self.content = Content.objects.create(title="Promo", content_type='web',
+                                              url='https://example.com', duration=10)
+        self.playlist = Playlist.objects.create(name="Matin")
+        self.start = timezone.make_aware(datetime(2026, 10, 1, 9, 0))
+
+    def log(self, minutes=0, action='play', content=None, **details):
+        return ScreenLog.objects.create(
+            screen=self.screen, content=content or self.content, action=action,
+            details=dict(details, playlist_id=str(self.playlist.pk)),
+            timestamp=self.start + timedelta(minutes=minutes))
+
+    def rollup(self, dimension, object_id, period=RollupPeriod.HOUR):
+        return {(rollup.bucket, rollup.plays, rollup.play_seconds) for rollup in PlayRollup.objects.filter(
+            period=period, dimension=dimension, object_id=object_id)}
+
+
+class RunRollupTests(RollupTestCase):
+    def test_batches_and_resume_do_not_double_count(self):
+        for minute in range(5):
+            self.log(minute)
+            # Logs hors preuve de diffusion entre les diffusions
+            self.log(minute, action='heartbeat')
+
+        # Arrêt après le premier lot : le point de reprise reste sur ce lot
+        merge, calls = rollups.merge, []
+
+        def failing_merge(totals):
+            calls.append(totals)
+            if len(calls) > 1:
+                raise RuntimeError("Job interrompu")
+            merge(totals)
+
+        with mock.patch.object(rollups, 'merge', side_effect=failing_merge), \
+                self.assertRaises(RuntimeError):
+            rollups.run_rollup(batch_size=2, lag=0)
+        self.assertEqual(self.rollup(RollupDimension.CONTENT, self.content.pk),
+                         {(self.start, 2, 20.0)})
+
+        self.assertEqual(rollups.run_rollup(batch_size=2, lag=0), 3)
+        self.assertEqual(rollups.run_rollup(batch_size=2, lag=0), 0)
+        expected = {(self.start, 5, 50.0)}
+        self.assertEqual(self.rollup(RollupDimension.CONTENT, self.content.pk), expected)
+        self.assertEqual(self.rollup(RollupDimension.SCREEN, self.screen.pk), expected)
+        self.assertEqual(self.rollup(RollupDimension.PLAYLIST, self.playlist.pk), expected)
+
+    def test_batch_boundary(self):
+        # Nombre de diffusions multiple de la taille de lot, dernier log hors diffusion
+        for minute in range(4):
+            self.log(minute, duration=3)
+        last = self.log(5, action='heartbeat')
+
+        self.assertEqual(rollups.run_rollup(batch_size=2, lag=0), 4)
+        self.assertEqual(rollups.rollup_state().last_log_id, last.pk)
+        self.assertEqual(self.rollup(RollupDimension.SCREEN, self.screen.pk, RollupPeriod.DAY),
+                         {(self.start.replace(hour=0), 4, 12.0)})
+
+    def test_late_commit_below_observed_id_is_counted(self):
+        self.log(0)
+        late, last = self.log(1), self.log(2)
+        late_id = late.pk
+        late.delete()
+
+        # Premier passage : observe le plus grand id, n'agrège rien
+        self.assertEqual(rollups.run_rollup(lag=60), 0)
+
+        # Log d'une transaction encore ouverte au passage précédent, commité depuis
+        ScreenLog.objects.create(id=late_id, screen=self.screen, content=self.content, action='play',
+                                 timestamp=self.start + timedelta(minutes=1))
+        self.assertEqual(rollups.run_rollup(lag=60), 0)
+
+        later = timezone.now() + timedelta(seconds=61)
+        with mock.patch.object(timezone, 'now', return_value=later):
+            self.assertEqual(rollups.run_rollup(lag=60), 3)
+        self.assertEqual(rollups.rollup_state().last_log_id, last.pk)
+        self.assertEqual(self.rollup(RollupDimension.CONTENT, self.content.pk), {(self.start, 3, 30.0)})
+
+
+class PlaySeriesTests(RollupTestCase):
+    def test_series(self):
+        other = Content.objects.create(title="Météo", content_type='web',
+                                       url='https://example.com/meteo', duration=5)
+        self.log(0)
+        self.log(5)
+        self.log(70)
+        self.log(75, content=other)
+        rollups.run_rollup(lag=0)
+
+        series = rollups.play_series(RollupPeriod.HOUR, RollupDimension.CONTENT,
+                                     self.start, self.start + timedelta(hours=3), limit=1)
+
+        self.assertEqual(series['buckets'], [
+            (self.start + timedelta(hours=hour)).isoformat() for hour in range(3)])
+        self.assertEqual(series['totals'], {'plays': [2, 2, 0], 'play_seconds': [20.0, 15.0, 0.0]})
+        self.assertEqual(len(series['series']), 1)
+        top = series['series'][0]
+        self.assertEqual((top['id'], top['label'], top['plays']), (str(self.content.pk), "Promo", 3))
+        self.assertEqual(top['points'], {'plays': [2, 1, 0], 'play_seconds': [20.0, 10.0, 0.0]})
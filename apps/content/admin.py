@@ -9,7 +9,7 @@ class ContentAdmin(admin.ModelAdmin):
                    'file_size_display', 'created_at']
     list_filter = ['content_type', 'is_active', 'created_at']
     search_fields = ['title']
-    readonly_fields = ['id', 'file_size', 'checksum', 'created_at', 'updated_at', 'preview']
+    readonly_fields = ['id', 'file_size', 'checksum', 'thumbnail', 'variants', 'created_at', 'updated_at', 'preview']
     
     fieldsets = (
         ('Informations générales', {
@@ -19,7 +19,7 @@ class ContentAdmin(admin.ModelAdmin):
             'fields': ('file', 'url', 'preview')
         }),
         ('Informations techniques', {
-            'fields': ('file_size', 'checksum'),
+            'fields': ('file_size', 'checksum', 'thumbnail', 'variants'),
             'classes': ('collapse',)
         }),
         ('Dates', {
@@ -38,11 +38,13 @@ class ContentAdmin(admin.ModelAdmin):
     file_size_display.short_description = 'Taille'
     
     def preview(self, obj):
-        if obj.file and obj.content_type == 'image':
+        if obj.thumbnail:
             return format_html(
                 '<img src="{}" style="max-width: 300px; max-height: 300px;"/>',
-                obj.file.url
+                obj.thumbnail_url
             )
+        elif obj.file and obj.content_type in ('image', 'video', 'pdf'):
+            return "Aperçu en cours de génération"
         elif obj.url:
             return format_html(
                 '<a href="{}" target="_blank">Ouvrir le lien</a>',
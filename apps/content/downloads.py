@@ -0,0 +1,128 @@
+"""
+Téléchargement des médias par les écrans : Range / If-Range (reprise des
+téléchargements interrompus) et checksum comme ETag fort.
+
+Si MEDIA_ACCEL_REDIRECT_PREFIX est défini, le transfert des octets est
+délégué à nginx via X-Accel-Redirect (le worker Django est libéré
+immédiatement, nginx gère lui-même les plages). Sinon Django sert le
+fichier : réponse complète via FileResponse (sendfile côté serveur WSGI
+quand il est disponible), réponse partielle par blocs.
+"""
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import quote_etag
+from rest_framework.negotiation import BaseContentNegotiation
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Le lecteur peut envoyer Accept: video/* : la réponse ne passe pas par un renderer"""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+
+def parse_range(header, size):
+    """
+    Retourne (début, fin) inclusifs pour une plage unique, None si l'en-tête
+    est absent ou non géré (réponse complète), ou False si la plage est hors du fichier.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Suffixe : les N derniers octets
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _etag_matches(etag, header):
+    return any(value.strip() == etag for value in header.split(','))
+
+
+def _iter_range(file, start, length):
+    with file:
+        file.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_content_file(request, content):
+    """Réponse HTTP pour le fichier d'un contenu (404 si le contenu n'a pas de fichier)"""
+    if not content.file:
+        return HttpResponse(status=404)
+
+    etag = quote_etag(content.checksum) if content.checksum else None
+    content_type = mimetypes.guess_type(content.file.name)[0] or 'application/octet-stream'
+
+    if etag and _etag_matches(etag, request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponse(status=304)
+        response['ETag'] = etag
+        return response
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '')
+    if accel_prefix:
+        # nginx sert le fichier et applique Range ; l'ETag est repris via $upstream_http_etag
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(content.file.name)
+        response['Accept-Ranges'] = 'bytes'
+        if etag:
+            response['ETag'] = etag
+        return response
+
+    size = content.file.size
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+
+    # If-Range : la plage n'est valable que si le fichier n'a pas changé
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if byte_range is not None and if_range and if_range.strip() != etag:
+        byte_range = None
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(content.file.storage.open(content.file.name, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _iter_range(content.file.storage.open(content.file.name, 'rb'), start, length),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    if etag:
+        response['ETag'] = etag
+    return response
@@ -0,0 +1,34 @@
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from apps.content.models import Content, release_renditions
+from apps.content.renditions import fleet_resolutions, rendition_queue
+
+
+class Command(BaseCommand):
+    help = "Génère les rendus manquants des contenus (vignettes, images d'affiche, variantes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help="Régénère aussi les rendus existants")
+
+    def handle(self, *args, **options):
+        contents = Content.objects.exclude(file='').exclude(file__isnull=True)
+        if options['force']:
+            for checksum in contents.order_by().values_list('checksum', flat=True).distinct():
+                release_renditions(checksum)
+            contents.update(thumbnail='', variants={})
+
+        resolutions = fleet_resolutions()
+        futures = []
+        for content in contents.iterator():
+            futures.extend(rendition_queue.submit(content, resolutions=resolutions))
+        wait(futures)
+        # Attend aussi les callbacks qui enregistrent les rendus
+        rendition_queue.shutdown()
+
+        built = sum(1 for future in futures if not future.exception() and future.result())
+        self.stdout.write(self.style.SUCCESS(
+            f"{built} rendu(s) généré(s), {len(futures) - built} inutile(s) ou en échec "
+            f"({len(resolutions)} résolution(s) dans le parc)"))
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.content.models import purge_blob
+from apps.content.storage import BLOB_PREFIX, content_storage
+
+
+class Command(BaseCommand):
+    help = "Supprime les blobs qui ne sont plus référencés par aucun contenu"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=None,
+                            help="Âge minimal (secondes) d'un blob supprimé "
+                                 "(défaut : BLOB_RELEASE_GRACE)")
+
+    def handle(self, *args, **options):
+        grace = options['grace']
+        if grace is None:
+            grace = getattr(settings, 'BLOB_RELEASE_GRACE', 600)
+
+        if not content_storage.exists(BLOB_PREFIX):
+            self.stdout.write("Aucun blob")
+            return
+
+        purged = 0
+        for directory in content_storage.listdir(BLOB_PREFIX)[0]:
+            for filename in content_storage.listdir(BLOB_PREFIX + directory)[1]:
+                if filename.startswith('.'):
+                    # Écriture en cours (fichier temporaire de _save)
+                    continue
+                if purge_blob(f'{BLOB_PREFIX}{directory}/{filename}', grace=grace):
+                    purged += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{purged} blob(s) orphelin(s) supprimé(s)"))
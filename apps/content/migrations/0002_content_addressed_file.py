@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:04
+
+import apps.content.models
+import apps.content.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='content',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=apps.content.storage.ContentAddressedStorage(), upload_to=apps.content.models.content_upload_to, verbose_name='Fichier'),
+        ),
+    ]
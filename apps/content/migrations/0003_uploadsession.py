@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0002_content_addressed_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=300, verbose_name='Titre')),
+                ('content_type', models.CharField(choices=[('image', 'Image'), ('video', 'Vidéo'), ('pdf', 'PDF'), ('web', 'Page Web')], max_length=20, verbose_name='Type')),
+                ('duration', models.IntegerField(default=10, verbose_name='Durée')),
+                ('filename', models.CharField(max_length=255, verbose_name='Nom du fichier')),
+                ('length', models.BigIntegerField(verbose_name='Taille totale')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='Octets reçus')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+            ],
+            options={
+                'verbose_name': 'Upload en cours',
+                'verbose_name_plural': 'Uploads en cours',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
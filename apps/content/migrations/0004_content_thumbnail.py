@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0003_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='thumbnail',
+            field=models.CharField(blank=True, editable=False, help_text='Aperçu généré en arrière-plan (voir renditions.py)', max_length=255, verbose_name='Vignette'),
+        ),
+    ]
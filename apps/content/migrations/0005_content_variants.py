@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0004_content_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Images réduites par résolution d\'écran ("1920x1080")', verbose_name='Variantes'),
+        ),
+    ]
@@ -1,6 +1,11 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+import os
 import uuid
-import hashlib
+from .renditions import RENDITION_PREFIX
+from .uploadhandlers import checksum_algorithm, file_checksum
+from .storage import BLOB_PREFIX, blob_name, content_storage
 
 
 class ContentType(models.TextChoices):
@@ -10,17 +15,29 @@ class ContentType(models.TextChoices):
     WEB = 'web', 'Page Web'
 
 
+def content_upload_to(instance, filename):
+    """Chemin adressé par le checksum (calculé dans Content.save avant l'écriture)"""
+    if instance.checksum:
+        return blob_name(instance.checksum, filename)
+    return timezone.now().strftime('content/%Y/%m/') + filename
+
+
 class Content(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=300, verbose_name="Titre")
     content_type = models.CharField(max_length=20, choices=ContentType.choices, verbose_name="Type")
-    file = models.FileField(upload_to='content/%Y/%m/', null=True, blank=True, verbose_name="Fichier")
+    file = models.FileField(upload_to=content_upload_to, storage=content_storage,
+                            null=True, blank=True, verbose_name="Fichier")
     url = models.URLField(blank=True, null=True, verbose_name="URL", 
                          help_text="Pour les contenus web")
     duration = models.IntegerField(default=10, verbose_name="Durée", 
                                   help_text="Durée d'affichage en secondes")
     file_size = models.BigIntegerField(default=0, verbose_name="Taille du fichier")
     checksum = models.CharField(max_length=64, blank=True, verbose_name="Checksum")
+    thumbnail = models.CharField(max_length=255, blank=True, editable=False, verbose_name="Vignette",
+                                 help_text="Aperçu généré en arrière-plan (voir renditions.py)")
+    variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Variantes",
+                                help_text="Images réduites par résolution d'écran (\"1920x1080\")")
     is_active = models.BooleanField(default=True, verbose_name="Actif")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
@@ -29,18 +46,127 @@ class Content(models.Model):
         ordering = ['-created_at']
         verbose_name = "Contenu"
         verbose_name_plural = "Contenus"
+        indexes = [
+            # Ordre par défaut (listes, tableau de bord) et contenus actifs seuls (sélecteurs de playlist)
+            models.Index(fields=['-created_at'], name='content_created_idx'),
+            models.Index(fields=['-created_at'], condition=models.Q(is_active=True),
+                         name='content_active_created_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
+    # Nom du fichier chargé depuis la base (None pour une nouvelle instance)
+    _loaded_file_name = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_file_name = dict(zip(field_names, values)).get('file')
+        return instance
+    
+    @property
+    def thumbnail_url(self):
+        return content_storage.url(self.thumbnail) if self.thumbnail else ''
+    
+    def attach_blob(self, name, checksum, size):
+        """Associe un blob déjà stocké et haché (upload par morceaux) sans le relire"""
+        self.file = name
+        self.checksum = checksum
+        self.file_size = size
+        self.thumbnail = ''
+        self.variants = {}
+        self._loaded_file_name = name
+    
+    def file_changed(self):
+        """Un nouveau fichier a été assigné depuis le chargement"""
+        return bool(self.file) and (not self.file._committed or self.file.name != self._loaded_file_name)
+    
     def save(self, *args, **kwargs):
-        if self.file:
-            # Calculer le checksum MD5
-            self.file.seek(0)
-            md5_hash = hashlib.md5()
-            for chunk in self.file.chunks():
-                md5_hash.update(chunk)
-            self.checksum = md5_hash.hexdigest()
-            self.file.seek(0)
+        # Checksum et taille uniquement quand un nouveau fichier est assigné
+        # (pas lors d'un simple changement de titre ou de toggle_active)
+        if self.file_changed():
+            uploaded = self.file.file
+            if getattr(uploaded, 'checksum_algorithm', None) == checksum_algorithm():
+                # Digest calculé pendant l'upload (voir uploadhandlers.py)
+                self.checksum = uploaded.checksum
+            else:
+                self.checksum = file_checksum(self.file)
             self.file_size = self.file.size
+            # Nouveaux rendus à générer pour le nouveau checksum (voir signals.py)
+            self.thumbnail = ''
+            self.variants = {}
+        previous_file_name = self._loaded_file_name
         super().save(*args, **kwargs)
+        self._loaded_file_name = self.file.name if self.file else None
+        
+        if previous_file_name != self._loaded_file_name:
+            release_blob(previous_file_name)
+
+
+class UploadSession(models.Model):
+    """Upload reprenable par morceaux : le contenu n'est créé qu'à la finalisation"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    title = models.CharField(max_length=300, verbose_name="Titre")
+    content_type = models.CharField(max_length=20, choices=ContentType.choices, verbose_name="Type")
+    duration = models.IntegerField(default=10, verbose_name="Durée")
+    filename = models.CharField(max_length=255, verbose_name="Nom du fichier")
+    length = models.BigIntegerField(verbose_name="Taille totale")
+    offset = models.BigIntegerField(default=0, verbose_name="Octets reçus")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Upload en cours"
+        verbose_name_plural = "Uploads en cours"
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.length})"
+    
+    @property
+    def part_name(self):
+        """Fichier partiel, dans MEDIA_ROOT pour un renommage sans copie à la finalisation"""
+        return f'uploads/{self.id}.part'
+
+
+def release_blob(name):
+    """
+    Supprime, après le commit, un blob qui n'est plus référencé par aucun
+    contenu. Avant le commit, la suppression peut encore être annulée ; un
+    blob réclamé récemment est conservé (voir purge_blob).
+    """
+    if name and name.startswith(BLOB_PREFIX):
+        transaction.on_commit(lambda: purge_blob(name))
+
+
+def purge_blob(name, grace=None):
+    """
+    Supprime un blob orphelin ; retourne True s'il a été supprimé.
+
+    Un blob réclamé depuis moins de grace secondes (BLOB_RELEASE_GRACE) est
+    conservé : un upload dédupliqué peut être sur le point de le référencer.
+    S'il reste orphelin, la commande purge_blobs le supprime plus tard.
+    """
+    if grace is None:
+        grace = getattr(settings, 'BLOB_RELEASE_GRACE', 600)
+    if Content.objects.filter(file=name).exists():
+        return False
+    try:
+        if content_storage.age(name) < grace:
+            return False
+    except FileNotFoundError:
+        return False
+    content_storage.delete(name)
+    release_renditions(os.path.splitext(os.path.basename(name))[0])
+    return True
+
+
+def release_renditions(checksum):
+    """Supprime les aperçus générés pour un checksum"""
+    directory = RENDITION_PREFIX + checksum[:2]
+    if not checksum or not content_storage.exists(directory):
+        return
+    for filename in content_storage.listdir(directory)[1]:
+        if filename.startswith(checksum + '-'):
+            content_storage.delete(f'{directory}/{filename}')
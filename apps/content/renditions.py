@@ -0,0 +1,301 @@
+"""
+Génération en arrière-plan des aperçus des contenus (vignettes des images,
+images d'affiche des vidéos, première page des PDF) et des variantes réduites
+des images pour les résolutions présentes dans le parc d'écrans.
+
+Les rendus sont nommés d'après le checksum du fichier source : un nouveau
+fichier produit un nouveau rendu, et deux contenus identiques partagent le
+même. Le travail (décodage, redimensionnement) est fait dans un pool de
+processus, hors du cycle requête/réponse ; seul le parent touche la base.
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+from .storage import content_storage
+from .uploadhandlers import checksum_algorithm, new_hasher
+
+logger = logging.getLogger(__name__)
+
+RENDITION_PREFIX = 'renditions/'
+THUMBNAIL_SIZE = (480, 360)
+
+# Marqueur (cache partagé) d'une résolution dont les variantes sont planifiées ;
+# les images ajoutées ensuite sont couvertes par submit() (fleet_resolutions)
+RESOLUTION_MARKER_PREFIX = 'renditions:resolution'
+RESOLUTION_MARKER_TIMEOUT = 24 * 3600
+# Ensemble des résolutions du parc (voir fleet_resolutions)
+FLEET_RESOLUTIONS_KEY = 'renditions:fleet-resolutions'
+FLEET_RESOLUTIONS_TIMEOUT = 3600
+
+
+def rendition_name(checksum, kind):
+    return f'{RENDITION_PREFIX}{checksum[:2]}/{checksum}-{kind}.jpg'
+
+
+# -----------------------------------------------------------------------------
+# Rendu (exécuté dans les processus du pool : ni ORM ni settings)
+# -----------------------------------------------------------------------------
+
+def _save_image(image, destination, size, quality):
+    from PIL import Image, ImageOps
+
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(size, Image.LANCZOS)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    # Fichier temporaire puis renommage : un rendu visible est toujours complet
+    directory = os.path.dirname(destination)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.rendition-', suffix='.jpg')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            image.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _extract_frame(source, content_type, workdir):
+    """Image fixe d'une vidéo (ffmpeg) ou d'un PDF (pdftoppm) ; None si l'outil manque"""
+    if content_type == 'video' and shutil.which('ffmpeg'):
+        frame = os.path.join(workdir, 'frame.jpg')
+        subprocess.run(['ffmpeg', '-loglevel', 'error', '-y', '-ss', '1', '-i', source,
+                        '-frames:v', '1', frame], check=True, timeout=120)
+        return frame
+    if content_type == 'pdf' and shutil.which('pdftoppm'):
+        prefix = os.path.join(workdir, 'page')
+        subprocess.run(['pdftoppm', '-jpeg', '-singlefile', '-f', '1', '-l', '1', source, prefix],
+                       check=True, timeout=120)
+        return prefix + '.jpg'
+    return None
+
+
+def render(source, destination, content_type, size, quality=80):
+    """Produit un JPEG d'au plus size ; retourne False si le type n'est pas géré"""
+    from PIL import Image
+
+    if content_type == 'image':
+        with Image.open(source) as image:
+            image.draft('RGB', size)
+            _save_image(image, destination, size, quality)
+        return True
+
+    with tempfile.TemporaryDirectory(prefix='rendition-') as workdir:
+        frame = _extract_frame(source, content_type, workdir)
+        if not frame or not os.path.exists(frame):
+            return False
+        with Image.open(frame) as image:
+            _save_image(image, destination, size, quality)
+    return True
+
+
+def render_variant(source, destination, box, algorithm):
+    """
+    Version réduite et réencodée d'une image pour un écran de taille box.
+    Retourne {'size', 'checksum'} du fichier produit, ou None si l'original
+    convient déjà (il tient dans box, ou il a de la transparence).
+    """
+    from PIL import Image
+
+    if not os.path.exists(destination):
+        with Image.open(source) as image:
+            if image.width <= box[0] and image.height <= box[1]:
+                return None
+            if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+                return None
+            image.draft('RGB', box)
+            _save_image(image, destination, box, quality=85)
+
+    hasher = new_hasher(algorithm)
+    with open(destination, 'rb') as variant:
+        for chunk in iter(lambda: variant.read(64 * 1024), b''):
+            hasher.update(chunk)
+    return {'size': os.path.getsize(destination), 'checksum': hasher.hexdigest()}
+
+
+def variant_key(resolution):
+    return f'{resolution[0]}x{resolution[1]}'
+
+
+def best_variant(variants, resolution):
+    """
+    Variante la plus petite couvrant la résolution de l'écran : dict
+    {'name', 'size', 'checksum'}, ou None pour utiliser l'original.
+    """
+    if not variants or not resolution:
+        return None
+
+    best, best_area = None, None
+    for key, variant in variants.items():
+        width, height = (int(dimension) for dimension in key.split('x'))
+        if width < resolution[0] or height < resolution[1]:
+            continue
+        if best_area is None or width * height < best_area:
+            best, best_area = variant, width * height
+    return best
+
+
+def fleet_resolutions():
+    """
+    Résolutions distinctes annoncées par les écrans du parc, en cache partagé
+    (FLEET_RESOLUTIONS_TIMEOUT) : pas de parcours des écrans à chaque contenu
+    enregistré. Une nouvelle résolution vide le cache (submit_resolution).
+    """
+    from apps.screens.models import Screen, parse_resolution
+
+    resolutions = cache.get(FLEET_RESOLUTIONS_KEY)
+    if resolutions is None:
+        resolutions = {parse_resolution(info) for info in Screen.objects.values_list('device_info', flat=True)}
+        resolutions.discard(None)
+        cache.set(FLEET_RESOLUTIONS_KEY, resolutions, FLEET_RESOLUTIONS_TIMEOUT)
+    return resolutions
+
+
+# -----------------------------------------------------------------------------
+# File de travaux (processus web / commande)
+# -----------------------------------------------------------------------------
+
+class RenditionQueue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = set()
+
+    @property
+    def workers(self):
+        return getattr(settings, 'RENDITION_WORKERS', 2)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn : pas de fork d'un worker avec connexions et threads ouverts
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _submit(self, key, on_result, fn, *args):
+        with self._lock:
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+
+        future = self._get_executor().submit(fn, *args)
+        future.add_done_callback(lambda f: self._done(f, key, on_result))
+        return future
+
+    def _done(self, future, key, on_result):
+        with self._lock:
+            self._pending.discard(key)
+        try:
+            result = future.result()
+            close_old_connections()
+            on_result(result)
+        except Exception:
+            logger.exception("Échec du rendu %s du contenu %s", key[2], key[0])
+        finally:
+            close_old_connections()
+
+    def submit(self, content, resolutions=None):
+        """
+        Planifie les rendus manquants d'un contenu (vignette, variantes pour les
+        résolutions du parc) ; retourne la liste des Futures.
+        """
+        if not content.file or not content.checksum:
+            return []
+
+        futures = []
+        source = content_storage.path(content.file.name)
+        if not content.thumbnail:
+            thumb_name = rendition_name(content.checksum, 'thumb')
+            if content_storage.exists(thumb_name):
+                # Déjà produit pour un fichier identique
+                _attach_thumbnail(content.pk, content.checksum, thumb_name)
+            else:
+                futures.append(self._submit(
+                    (content.pk, content.checksum, 'thumb'),
+                    lambda done, name=thumb_name: done and _attach_thumbnail(content.pk, content.checksum, name),
+                    render, source, content_storage.path(thumb_name), content.content_type, THUMBNAIL_SIZE))
+
+        if content.content_type == 'image':
+            if resolutions is None:
+                resolutions = fleet_resolutions()
+            for resolution in resolutions:
+                key = variant_key(resolution)
+                if key in (content.variants or {}):
+                    continue
+                name = rendition_name(content.checksum, key)
+                futures.append(self._submit(
+                    (content.pk, content.checksum, key),
+                    lambda result, key=key, name=name: _attach_variant(
+                        content.pk, content.checksum, key, result and dict(result, name=name)),
+                    render_variant, source, content_storage.path(name), resolution,
+                    checksum_algorithm()))
+
+        return [future for future in futures if future]
+
+    def submit_resolution(self, resolution):
+        """
+        Nouvelle résolution dans le parc : variantes de toutes les images,
+        planifiées depuis un thread (hors requête). Retourne False si la
+        résolution a déjà été planifiée (heartbeats répétés, autres workers).
+        """
+        width, height = resolution
+        if not cache.add(f'{RESOLUTION_MARKER_PREFIX}:{width}x{height}', True, RESOLUTION_MARKER_TIMEOUT):
+            return False
+        cache.delete(FLEET_RESOLUTIONS_KEY)
+        threading.Thread(target=self._submit_resolution, args=(resolution,),
+                         name='rendition-resolution', daemon=True).start()
+        return True
+
+    def _submit_resolution(self, resolution):
+        from .models import Content
+
+        try:
+            images = Content.objects.filter(content_type='image').exclude(file='').exclude(checksum='')
+            for content in images.iterator():
+                self.submit(content, resolutions=[resolution])
+        except Exception:
+            logger.exception("Échec de la planification des variantes %sx%s", *resolution)
+        finally:
+            close_old_connections()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def _attach_thumbnail(content_id, checksum, name):
+    from .models import Content
+
+    # Filtre sur le checksum : le fichier a pu être remplacé entre-temps
+    Content.objects.filter(pk=content_id, checksum=checksum).update(thumbnail=name)
+
+
+def _attach_variant(content_id, checksum, key, variant):
+    """Enregistre une variante (None : l'original convient) ; save() invalide les manifestes"""
+    from .models import Content
+
+    with transaction.atomic():
+        content = Content.objects.select_for_update().filter(pk=content_id, checksum=checksum).first()
+        if content is None:
+            return
+        content.variants = dict(content.variants or {}, **{key: variant})
+        content.save(update_fields=['variants', 'updated_at'])
+
+
+rendition_queue = RenditionQueue()
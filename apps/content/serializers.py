@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Content
+from .models import Content, UploadSession
 
 
 class ContentSerializer(serializers.ModelSerializer):
@@ -19,3 +19,16 @@ class ContentSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.file.url)
             return obj.file.url
         return None
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'title', 'content_type', 'duration', 'filename',
+                  'length', 'offset', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'offset', 'created_at', 'updated_at']
+    
+    def validate_length(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("La taille doit être positive")
+        return value
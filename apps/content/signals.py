@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Content, release_blob
+from .renditions import rendition_queue
+
+
+@receiver(post_save, sender=Content)
+def queue_content_renditions(sender, instance, created, **kwargs):
+    """Planifie les rendus d'un nouveau fichier (aperçu, variantes des images)"""
+    # _loaded_file_name est encore l'ancien nom pendant post_save (voir Content.save) :
+    # titre, toggle_active ou variante enregistrée ne replanifient rien
+    if not instance.file or not (created or instance.file.name != instance._loaded_file_name):
+        return
+    transaction.on_commit(lambda: rendition_queue.submit(instance))
+
+
+@receiver(post_delete, sender=Content)
+def release_content_blob(sender, instance, **kwargs):
+    """Décrémente les références du blob du contenu supprimé"""
+    if instance.file:
+        release_blob(instance.file.name)
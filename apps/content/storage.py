@@ -0,0 +1,82 @@
+"""
+Stockage adressé par le contenu des médias.
+
+Les fichiers sont rangés sous blobs/<aa>/<checksum><extension> : deux uploads
+identiques partagent le même fichier et la même URL, immuable (le contenu
+d'une URL ne change jamais). Le nombre de références d'un blob est le nombre
+de contenus qui le pointent ; il est supprimé quand ce nombre tombe à zéro.
+
+Un blob réutilisé par déduplication est « réclamé » (mtime remis à jour) :
+le contenu qui va le référencer n'est pas encore commité, et release_blob
+ne supprime pas un blob réclamé depuis moins de BLOB_RELEASE_GRACE.
+"""
+import os
+import tempfile
+import time
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs/'
+
+
+def blob_name(checksum, filename):
+    extension = os.path.splitext(filename)[1].lower()
+    return f'{BLOB_PREFIX}{checksum[:2]}/{checksum}{extension}'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # Même nom = mêmes octets pour un blob : pas de suffixe aléatoire
+        if name.startswith(BLOB_PREFIX):
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if not name.startswith(BLOB_PREFIX):
+            return super()._save(name, content)
+
+        if self.claim(name):
+            # Déduplication : le blob est déjà stocké
+            return name
+
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Écriture dans un fichier temporaire puis renommage atomique : deux
+        # uploads simultanés du même contenu produisent le même fichier
+        if hasattr(content, 'temporary_file_path'):
+            file_move_safe(content.temporary_file_path(), full_path, allow_overwrite=True)
+        else:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+            try:
+                with os.fdopen(fd, 'wb') as destination:
+                    for chunk in content.chunks():
+                        destination.write(chunk)
+                os.replace(tmp_path, full_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+    def claim(self, name):
+        """Marque un blob existant comme réutilisé ; False s'il n'existe pas (ou plus)"""
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def age(self, name):
+        """Secondes écoulées depuis l'écriture ou la dernière réclamation du blob"""
+        return time.time() - os.path.getmtime(self.path(name))
+
+
+content_storage = ContentAddressedStorage()
@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .downloads import parse_range
+from .models import Content
+from .storage import blob_name, content_storage
+
+DATA = bytes(range(256)) * 4
+
+
+class ParseRangeTests(TestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1024), (0, 99))
+        self.assertEqual(parse_range('bytes=1000-', 1024), (1000, 1023))
+        self.assertEqual(parse_range('bytes=1000-5000', 1024), (1000, 1023))
+        self.assertEqual(parse_range('bytes=-100', 1024), (924, 1023))
+        self.assertEqual(parse_range('bytes=-5000', 1024), (0, 1023))
+
+    def test_unsupported_or_unsatisfiable(self):
+        self.assertIsNone(parse_range(None, 1024))
+        self.assertIsNone(parse_range('bytes=-', 1024))
+        self.assertIsNone(parse_range('bytes=0-1,5-9', 1024))
+        self.assertIsNone(parse_range('items=0-1', 1024))
+        self.assertIs(parse_range('bytes=-0', 1024), False)
+        self.assertIs(parse_range('bytes=1024-', 1024), False)
+        self.assertIs(parse_range('bytes=10-5', 1024), False)
+
+
+@override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='')
+class ContentDownloadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        name = content_storage.save(blob_name('c0ffee', 'video.mp4'), ContentFile(DATA))
+        self.content = Content(title="Vidéo", content_type='video')
+        self.content.attach_blob(name, 'c0ffee', len(DATA))
+        self.content.save()
+        self.url = f'/api/content/{self.content.pk}/download/'
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('ecran', password='x'))
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_response(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='video/*')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"c0ffee"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.body(response), DATA)
+
+    def test_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(DATA)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(self.body(response), DATA[100:200])
+
+    def test_suffix_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-24')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 1000-1023/{len(DATA)}')
+        self.assertEqual(self.body(response), DATA[-24:])
+
+    def test_if_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"c0ffee"')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), DATA[10:20])
+
+        # Fichier changé depuis le début du téléchargement : réponse complète
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"autre"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), DATA)
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(DATA)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(DATA)}')
+
+    def test_not_modified(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"autre", "c0ffee"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], '"c0ffee"')
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected/')
+    def test_accel_redirect(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.content.file.name}')
+        self.assertEqual(response['ETag'], '"c0ffee"')
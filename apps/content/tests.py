@@ -0,0 +1,171 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from . import uploads
+from .models import Content
+from .renditions import fleet_resolutions, rendition_name, rendition_queue
+from .storage import blob_name, content_storage
+
+
+class InterruptedStream:
+    """Flux client coupé après la première lecture"""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+        self._reads = 0
+
+    def read(self, size):
+        self._reads += 1
+        if self._reads > 1:
+            raise OSError("Connexion interrompue")
+        return self._data.read(size)
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def append(self, session, offset, stream, length):
+        with self.captureOnCommitCallbacks(execute=True):
+            return uploads.append_chunk(session.pk, offset, stream, length)
+
+    def test_interrupted_chunk_keeps_checksum(self):
+        data = bytes(range(256)) * 1000
+        session = uploads.create_session(title='Vidéo', content_type='video',
+                                         filename='video.mp4', length=len(data))
+
+        self.append(session, 0, io.BytesIO(data[:100000]), 100000)
+
+        # Coupure après la première lecture du morceau suivant
+        with self.assertRaises(OSError):
+            self.append(session, 100000, InterruptedStream(data[100000:]), len(data) - 100000)
+        session.refresh_from_db()
+        self.assertEqual(session.offset, 100000)
+
+        self.append(session, 100000, io.BytesIO(data[100000:]), len(data) - 100000)
+        content = uploads.finalize_session(session.pk)
+
+        hasher = uploads.new_hasher()
+        hasher.update(data)
+        self.assertEqual(content.checksum, hasher.hexdigest())
+        with content.file.open('rb') as stored:
+            self.assertEqual(hashlib.sha256(stored.read()).digest(), hashlib.sha256(data).digest())
+
+    def test_offset_mismatch_is_rejected(self):
+        session = uploads.create_session(title='Vidéo', content_type='video', filename='video.mp4', length=10)
+        with self.assertRaises(uploads.UploadError) as error:
+            self.append(session, 5, io.BytesIO(b'12345'), 5)
+        self.assertEqual(error.exception.status, 409)
+
+
+class RenditionSchedulingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_save_without_new_file_does_not_queue_renditions(self):
+        content = Content(title="Image", content_type='image')
+        content.attach_blob('blobs/ab/abcdef.png', 'abcdef', 10)
+        content.save()
+        content = Content.objects.get(pk=content.pk)
+        with mock.patch.object(rendition_queue, 'submit') as submit, \
+                self.captureOnCommitCallbacks(execute=True):
+            content.is_active = False
+            content.save()
+        submit.assert_not_called()
+
+    def test_resolution_is_scheduled_once(self):
+        with mock.patch.object(rendition_queue, '_submit_resolution') as scan:
+            self.assertTrue(rendition_queue.submit_resolution((1920, 1080)))
+            self.assertFalse(rendition_queue.submit_resolution((1920, 1080)))
+            self.assertTrue(rendition_queue.submit_resolution((1280, 720)))
+        self.assertEqual(scan.call_count, 2)
+
+    def test_thumbnail_callback_keeps_thumbnail_name(self):
+        content = Content(title="Image", content_type='image')
+        content.attach_blob('blobs/ab/abcdef.png', 'abcdef', 10)
+        content.save()
+
+        callbacks = {}
+        with mock.patch.object(rendition_queue, '_submit',
+                               side_effect=lambda key, on_result, *args: callbacks.setdefault(key[2], on_result)):
+            rendition_queue.submit(content, resolutions=[(800, 600), (1920, 1080)])
+
+        # Le rendu de la vignette se termine après la planification des variantes
+        callbacks['thumb'](True)
+        content.refresh_from_db()
+        self.assertEqual(content.thumbnail, rendition_name('abcdef', 'thumb'))
+
+    def test_fleet_resolutions_are_cached(self):
+        from apps.screens.models import Screen
+
+        Screen.objects.create(name="Accueil", location="Hall", device_info={'resolution': '1920x1080'})
+        self.assertEqual(fleet_resolutions(), {(1920, 1080)})
+        with self.assertNumQueries(0):
+            self.assertEqual(fleet_resolutions(), {(1920, 1080)})
+
+        with mock.patch.object(rendition_queue, '_submit_resolution'):
+            rendition_queue.submit_resolution((800, 600))
+        Screen.objects.create(name="Caisse", location="Hall", device_info={'resolution': '800x600'})
+        self.assertEqual(fleet_resolutions(), {(1920, 1080), (800, 600)})
+
+
+class BlobReleaseTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, BLOB_RELEASE_GRACE=600)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.name = blob_name('abcdef', 'image.png')
+        content_storage.save(self.name, ContentFile(b'image'))
+        self.content = Content(title="Image", content_type='image')
+        self.content.attach_blob(self.name, 'abcdef', 5)
+        self.content.save()
+
+    def age_blob(self):
+        old = time.time() - 3600
+        os.utime(content_storage.path(self.name), (old, old))
+
+    def test_blob_is_deleted_after_commit(self):
+        self.age_blob()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.content.delete()
+            # Suppression encore annulable : le fichier doit rester
+            self.assertTrue(content_storage.exists(self.name))
+        self.assertFalse(content_storage.exists(self.name))
+
+    def test_recently_claimed_blob_is_kept(self):
+        self.age_blob()
+        # Upload dédupliqué en cours, pas encore commité
+        content_storage.save(self.name, ContentFile(b'image'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.content.delete()
+        self.assertTrue(content_storage.exists(self.name))
+
+        call_command('purge_blobs', grace=0, stdout=io.StringIO())
+        self.assertFalse(content_storage.exists(self.name))
+
+    def test_referenced_blob_is_kept(self):
+        self.age_blob()
+        other = Content(title="Copie", content_type='image')
+        other.attach_blob(self.name, 'abcdef', 5)
+        other.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.content.delete()
+        call_command('purge_blobs', grace=0, stdout=io.StringIO())
+        self.assertTrue(content_storage.exists(self.name))
@@ -0,0 +1,68 @@
+"""
+Gestionnaires d'upload calculant le checksum pendant la réception du fichier.
+
+Le fichier n'est lu qu'une seule fois (pendant son écriture sur disque ou en
+mémoire) : Content.save réutilise le digest au lieu de relire tout le fichier.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+CHECKSUM_ALGORITHMS = ['md5', 'sha256', 'blake2b']
+
+
+def checksum_algorithm():
+    """Algorithme configuré (CONTENT_CHECKSUM_ALGORITHM), md5 par défaut pour la compatibilité"""
+    algorithm = getattr(settings, 'CONTENT_CHECKSUM_ALGORITHM', 'md5')
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise ValueError(f"Algorithme de checksum non supporté : {algorithm}")
+    return algorithm
+
+
+def new_hasher(algorithm=None):
+    algorithm = algorithm or checksum_algorithm()
+    if algorithm == 'blake2b':
+        # 32 octets : le digest hexadécimal tient dans Content.checksum (64 caractères)
+        return hashlib.blake2b(digest_size=32)
+    return hashlib.new(algorithm)
+
+
+def file_checksum(file, algorithm=None):
+    """Checksum d'un fichier déjà reçu (repli quand aucun gestionnaire ne l'a calculé)"""
+    hasher = new_hasher(algorithm)
+    file.seek(0)
+    for chunk in file.chunks():
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+
+class HashingUploadMixin:
+    def new_file(self, *args, **kwargs):
+        # Avant super() : MemoryFileUploadHandler lève StopFutureHandlers quand il prend le fichier
+        self.algorithm = checksum_algorithm()
+        self.hasher = new_hasher(self.algorithm)
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        data = super().receive_data_chunk(raw_data, start)
+        if data is None:
+            # Bloc conservé par ce gestionnaire : on le hache au passage
+            self.hasher.update(raw_data)
+        return data
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.checksum = self.hasher.hexdigest()
+            file.checksum_algorithm = self.algorithm
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
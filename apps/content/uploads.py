@@ -0,0 +1,185 @@
+"""
+Upload reprenable par morceaux (inspiré du protocole tus) pour les gros médias.
+
+Le client crée une session (taille totale annoncée), envoie les morceaux par
+PATCH avec l'en-tête Upload-Offset, reprend après une coupure en relisant
+l'offset (HEAD), puis finalise. Chaque morceau est reçu hors verrou dans un
+fichier intermédiaire, puis ajouté au fichier partiel sous MEDIA_ROOT sous
+verrou de la session : à la finalisation, le fichier partiel est renommé
+(sans copie) en blob adressé par son checksum et le contenu est créé.
+
+Le checksum est calculé au fil des morceaux tant qu'ils arrivent sur le même
+worker ; sinon le fichier est relu une seule fois à la finalisation.
+"""
+import os
+import shutil
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Content, UploadSession
+from .storage import blob_name, content_storage
+from .uploadhandlers import file_checksum, new_hasher
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Morceau refusé ; status est le code HTTP à renvoyer"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+class _Hashers:
+    """Hashers en cours par session, valables seulement à l'offset mémorisé"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashers = {}
+
+    def get(self, session_id, offset):
+        with self._lock:
+            entry = self._hashers.get(session_id)
+        if entry and entry[0] == offset:
+            # Copie : l'entrée mémorisée reste valable si le morceau échoue
+            return entry[1].copy()
+        if offset == 0:
+            return new_hasher()
+        return None
+
+    def set(self, session_id, offset, hasher):
+        with self._lock:
+            if hasher is None:
+                self._hashers.pop(session_id, None)
+            else:
+                self._hashers[session_id] = (offset, hasher)
+
+    def pop(self, session_id):
+        with self._lock:
+            return self._hashers.pop(session_id, None)
+
+
+_hashers = _Hashers()
+
+
+def max_chunk_size():
+    return getattr(settings, 'UPLOAD_CHUNK_MAX_SIZE', 50 * 1024 * 1024)
+
+
+def purge_expired_sessions():
+    """Supprime les sessions abandonnées et leurs fichiers partiels"""
+    ttl = getattr(settings, 'UPLOAD_SESSION_TTL', 24 * 60 * 60)
+    expired = UploadSession.objects.filter(updated_at__lt=timezone.now() - timedelta(seconds=ttl))
+    for session in expired:
+        abort_session(session)
+
+
+def create_session(**fields):
+    purge_expired_sessions()
+    session = UploadSession.objects.create(**fields)
+    path = content_storage.path(session.part_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return session
+
+
+def _check_offset(session, offset, length):
+    if offset != session.offset:
+        raise UploadError("Upload-Offset ne correspond pas aux octets reçus", 409)
+    if offset + length > session.length:
+        raise UploadError("Le morceau dépasse la taille annoncée", 413)
+
+
+def append_chunk(session_id, offset, stream, length):
+    """Écrit un morceau à l'offset annoncé ; retourne la session mise à jour"""
+    if length is None:
+        raise UploadError("En-tête Content-Length requis", 411)
+    if length > max_chunk_size():
+        raise UploadError("Morceau trop volumineux", 413)
+
+    session = UploadSession.objects.get(pk=session_id)
+    _check_offset(session, offset, length)
+
+    # Réception hors verrou dans un fichier intermédiaire, hachée dans une copie :
+    # un morceau interrompu ne modifie ni le fichier partiel ni le hasher mémorisé
+    part_path = content_storage.path(session.part_name)
+    staging_path = f'{part_path}.{uuid.uuid4().hex}'
+    hasher = _hashers.get(session_id, offset)
+    written = 0
+    try:
+        with open(staging_path, 'wb') as staging:
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    break
+                staging.write(data)
+                if hasher is not None:
+                    hasher.update(data)
+                written += len(data)
+
+        with transaction.atomic():
+            # Verrou de ligne : un seul écrivain par session ; l'offset a pu avancer entre-temps
+            session = UploadSession.objects.select_for_update().get(pk=session_id)
+            _check_offset(session, offset, length)
+
+            with open(part_path, 'r+b') as part, open(staging_path, 'rb') as staging:
+                part.seek(offset)
+                part.truncate()
+                shutil.copyfileobj(staging, part, READ_SIZE)
+
+            session.offset = offset + written
+            session.save(update_fields=['offset', 'updated_at'])
+            new_offset = session.offset
+            # Hasher mémorisé seulement une fois l'offset enregistré
+            transaction.on_commit(lambda: _hashers.set(session_id, new_offset, hasher))
+    finally:
+        os.unlink(staging_path)
+    return session
+
+
+def finalize_session(session_id):
+    """Déplace le fichier complet vers son blob et crée le contenu"""
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id)
+        if session.offset != session.length:
+            raise UploadError("Upload incomplet", 409)
+
+        part_path = content_storage.path(session.part_name)
+        entry = _hashers.pop(session.pk)
+        if entry and entry[0] == session.length:
+            checksum = entry[1].hexdigest()
+        else:
+            with content_storage.open(session.part_name, 'rb') as part:
+                checksum = file_checksum(part)
+
+        name = blob_name(checksum, session.filename)
+        if content_storage.claim(name):
+            # Déduplication : le blob est déjà stocké
+            os.unlink(part_path)
+        else:
+            blob_path = content_storage.path(name)
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(part_path, blob_path)
+            if content_storage.file_permissions_mode is not None:
+                os.chmod(blob_path, content_storage.file_permissions_mode)
+
+        content = Content(title=session.title, content_type=session.content_type,
+                          duration=session.duration)
+        content.attach_blob(name, checksum, session.length)
+        content.save()
+        session.delete()
+    return content
+
+
+def abort_session(session):
+    _hashers.pop(session.pk)
+    path = content_storage.path(session.part_name)
+    if os.path.exists(path):
+        os.unlink(path)
+    session.delete()
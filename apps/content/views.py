@@ -1,13 +1,16 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import Content
-from .serializers import ContentSerializer
+from .models import Content, UploadSession
+from .serializers import ContentSerializer, UploadSessionSerializer
+from .downloads import IgnoreClientContentNegotiation, serve_content_file
+from . import uploads
 
 
 class ContentViewSet(viewsets.ModelViewSet):
@@ -24,6 +27,12 @@ class ContentViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(contents, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get', 'head'],
+            content_negotiation_class=IgnoreClientContentNegotiation)
+    def download(self, request, pk=None):
+        """Téléchargement du fichier (Range, If-Range, ETag = checksum)"""
+        return serve_content_file(request, self.get_object())
+    
     @action(detail=True, methods=['post'])
     def toggle_active(self, request, pk=None):
         """Active/désactive un contenu"""
@@ -34,6 +43,74 @@ class ContentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+def _upload_headers(response, session):
+    response['Upload-Offset'] = str(session.offset)
+    response['Upload-Length'] = str(session.length)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Upload reprenable par morceaux :
+    POST (création) → PATCH avec Upload-Offset (morceaux) → POST finalize.
+    HEAD/GET donnent l'offset à partir duquel reprendre.
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = uploads.create_session(**serializer.validated_data)
+        response = Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED)
+        response['Location'] = request.build_absolute_uri(
+            reverse('upload-detail', kwargs={'pk': session.pk}))
+        return _upload_headers(response, session)
+    
+    def retrieve(self, request, *args, **kwargs):
+        session = self.get_object()
+        return _upload_headers(Response(self.get_serializer(session).data), session)
+    
+    def partial_update(self, request, *args, **kwargs):
+        """Ajoute un morceau ; le corps brut est écrit au fil de la lecture"""
+        session = self.get_object()
+        try:
+            offset = int(request.META.get('HTTP_UPLOAD_OFFSET', ''))
+        except ValueError:
+            return Response({'error': 'En-tête Upload-Offset requis'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        length = request.META.get('CONTENT_LENGTH')
+        try:
+            session = uploads.append_chunk(session.pk, offset, request.stream,
+                                           int(length) if length else None)
+        except uploads.UploadError as exc:
+            response = Response({'error': str(exc)}, status=exc.status)
+            session.refresh_from_db()
+            return _upload_headers(response, session)
+        return _upload_headers(Response(status=status.HTTP_204_NO_CONTENT), session)
+    
+    def destroy(self, request, *args, **kwargs):
+        uploads.abort_session(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Crée le contenu une fois tous les octets reçus"""
+        session = self.get_object()
+        try:
+            content = uploads.finalize_session(session.pk)
+        except uploads.UploadError as exc:
+            return _upload_headers(Response({'error': str(exc)}, status=exc.status), session)
+        serializer = ContentSerializer(content, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
 # =============================================================================
 # VUES WEB POUR LES TEMPLATES HTML
 # =============================================================================
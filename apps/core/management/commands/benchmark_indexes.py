@@ -0,0 +1,120 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.content.models import Content
+from apps.playlists.models import Playlist
+from apps.screens.models import Screen
+
+# Index ajouté par la migration playlists 0003 sur la table d'association
+SCREEN_ASSIGNMENT_INDEX = 'playlist_screens_screen_idx'
+
+
+class Command(BaseCommand):
+    help = ("Compare plans (EXPLAIN) et temps des requêtes du parc avec et sans les index "
+            "composites, sur un jeu de données généré puis annulé (rollback)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--screens', type=int, default=10000)
+        parser.add_argument('--playlists', type=int, default=1000)
+        parser.add_argument('--contents', type=int, default=20000)
+        parser.add_argument('--assignments', type=int, default=8, help="Playlists par écran")
+        parser.add_argument('--repeat', type=int, default=20, help="Exécutions par requête")
+        parser.add_argument('--force', action='store_true',
+                            help="Accepte une base non vide (les données générées sont annulées)")
+
+    def handle(self, *args, **options):
+        if Screen.objects.exists() and not options['force']:
+            raise CommandError("La base contient déjà des écrans : utilisez une base de test ou --force")
+
+        with transaction.atomic():
+            screen_id = self.seed(options)
+            self.analyze()
+            with_indexes = self.measure(screen_id, options['repeat'])
+
+            self.drop_indexes()
+            self.analyze()
+            without_indexes = self.measure(screen_id, options['repeat'])
+
+            # Ni les données ni la suppression des index ne sont conservées
+            transaction.set_rollback(True)
+
+        for label in with_indexes:
+            before_plan, before_ms = without_indexes[label]
+            after_plan, after_ms = with_indexes[label]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(f"  sans index : {before_ms:8.3f} ms")
+            self.stdout.write(self._indent(before_plan))
+            self.stdout.write(f"  avec index : {after_ms:8.3f} ms")
+            self.stdout.write(self._indent(after_plan))
+
+    def seed(self, options):
+        now = timezone.now()
+        rng = random.Random(42)
+
+        screens = [Screen(name=f"Bench {i}", location="Bench", api_token=uuid.uuid4().hex,
+                          last_heartbeat=now - timedelta(minutes=rng.randint(0, 60 * 24 * 7)))
+                   for i in range(options['screens'])]
+        Screen.objects.bulk_create(screens, batch_size=1000)
+
+        contents = [Content(title=f"Bench {i}", content_type='image', is_active=rng.random() < 0.8)
+                    for i in range(options['contents'])]
+        Content.objects.bulk_create(contents, batch_size=1000)
+
+        playlists = [Playlist(name=f"Bench {i}", priority=rng.randint(0, 10), is_active=rng.random() < 0.7)
+                     for i in range(options['playlists'])]
+        Playlist.objects.bulk_create(playlists, batch_size=1000)
+
+        through = Playlist.screens.through
+        count = min(options['assignments'], len(playlists))
+        through.objects.bulk_create([
+            through(screen_id=screen.pk, playlist_id=playlist.pk)
+            for screen in screens for playlist in rng.sample(playlists, count)
+        ], batch_size=5000)
+        return screens[len(screens) // 2].pk
+
+    def queries(self, screen_id):
+        since = timezone.now() - timedelta(minutes=5)
+        return {
+            "Playlists actives par priorité": Playlist.objects.filter(is_active=True).order_by(
+                '-priority', '-created_at')[:50],
+            "Playlists actives récentes": Playlist.objects.filter(is_active=True).order_by('-created_at')[:50],
+            "Playlists d'un écran": Playlist.screens.through.objects.filter(
+                screen_id=screen_id, playlist__is_active=True).values_list('playlist_id', flat=True),
+            "Écrans par dernier heartbeat": Screen.objects.order_by('-last_heartbeat')[:5],
+            "Écrans en ligne": Screen.objects.filter(last_heartbeat__gte=since).values('pk'),
+            "Contenus récents": Content.objects.order_by('-created_at')[:5],
+            "Contenus actifs récents": Content.objects.filter(is_active=True).order_by('-created_at')[:20],
+        }
+
+    def measure(self, screen_id, repeat):
+        results = {}
+        for label, queryset in self.queries(screen_id).items():
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                durations.append((time.perf_counter() - start) * 1000)
+            results[label] = (queryset.explain(), statistics.median(durations))
+        return results
+
+    def drop_indexes(self):
+        names = [index.name for model in (Playlist, Screen, Content) for index in model._meta.indexes]
+        names.append(SCREEN_ASSIGNMENT_INDEX)
+        with connection.cursor() as cursor:
+            for name in names:
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+
+    def analyze(self):
+        # Statistiques à jour pour que le planificateur voie le volume généré
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def _indent(self, plan):
+        return '\n'.join(f"      {line}" for line in plan.splitlines())
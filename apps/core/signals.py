@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.content.models import Content
+from apps.playlists.models import Playlist
+from apps.screens.models import Screen
+from .stats import invalidate_stats
+
+
+@receiver(post_save, sender=Screen)
+@receiver(post_delete, sender=Screen)
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+@receiver(post_save, sender=Playlist)
+@receiver(post_delete, sender=Playlist)
+def invalidate_dashboard_stats(sender, **kwargs):
+    """Les compteurs du tableau de bord sont recalculés à la prochaine lecture"""
+    invalidate_stats()
+
+
+@receiver(m2m_changed, sender=Playlist.screens.through)
+def invalidate_dashboard_stats_on_assignment(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_stats()
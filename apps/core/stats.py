@@ -0,0 +1,59 @@
+"""
+Statistiques du tableau de bord : une requête d'agrégat par table, mises en
+cache pour DASHBOARD_STATS_CACHE_TIMEOUT secondes et invalidées par signaux
+(voir signals.py).
+
+Les heartbeats sont écrits par bulk_update sans signal : le nombre d'écrans
+en ligne n'est rafraîchi que par l'expiration du cache, d'où un TTL court.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from apps.analytics.counters import plays_today
+from apps.content.models import Content
+from apps.playlists.models import Playlist
+from apps.screens.models import Screen
+
+STATS_CACHE_KEY = 'dashboard:stats'
+# Délai de Screen.is_online()
+ONLINE_WINDOW = timedelta(minutes=5)
+
+
+def compute_stats(now=None):
+    now = now or timezone.now()
+    # EXISTS plutôt que DISTINCT sur la jointure écrans <-> playlists
+    assigned = Exists(Playlist.screens.through.objects.filter(screen=OuterRef('pk')))
+
+    stats = {}
+    stats.update(Screen.objects.aggregate(
+        total_screens=Count('pk'),
+        online_screens=Count('pk', filter=Q(last_heartbeat__gte=now - ONLINE_WINDOW)),
+        assigned_screens=Count('pk', filter=Q(assigned)),
+    ))
+    stats.update(Content.objects.aggregate(
+        total_content=Count('pk'),
+        active_content=Count('pk', filter=Q(is_active=True)),
+    ))
+    stats.update(Playlist.objects.aggregate(
+        total_playlists=Count('pk'),
+        active_playlists=Count('pk', filter=Q(is_active=True)),
+        scheduled_playlists=Count('pk', filter=Q(start_date__isnull=False)),
+    ))
+    return stats
+
+
+def get_stats():
+    """Compteurs du parc (en cache) et diffusions du jour"""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_stats()
+        cache.set(STATS_CACHE_KEY, stats, settings.DASHBOARD_STATS_CACHE_TIMEOUT)
+    return {**stats, 'views_today': plays_today()}
+
+
+def invalidate_stats():
+    cache.delete(STATS_CACHE_KEY)
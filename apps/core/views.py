@@ -1,28 +1,25 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
+from django.http import JsonResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta
+from apps.analytics.models import RollupDimension, RollupPeriod
+from apps.analytics.rollups import day_range, play_series, rollup_state
 from apps.screens.models import Screen
 from apps.content.models import Content
-from apps.playlists.models import Playlist
+from .stats import get_stats
+
+# Nombre maximal de jours couverts par /analytics/data/ selon la période
+ANALYTICS_MAX_DAYS = {RollupPeriod.HOUR: 31, RollupPeriod.DAY: 366}
 
 
 @login_required
 def dashboard(request):
     """Vue principale du tableau de bord"""
 
-    # Statistiques générales
-    total_screens = Screen.objects.count()
-    online_screens = Screen.objects.filter(
-        last_heartbeat__gte=timezone.now() - timedelta(minutes=5)
-    ).count()
-
-    total_content = Content.objects.count()
-    active_content = Content.objects.filter(is_active=True).count()
-
-    total_playlists = Playlist.objects.count()
-    active_playlists = Playlist.objects.filter(is_active=True).count()
+    # Statistiques générales (en cache, voir apps.core.stats)
+    stats = get_stats()
 
     # Écrans récents
     recent_screens = Screen.objects.all().order_by('-last_heartbeat')[:5]
@@ -31,18 +28,10 @@ def dashboard(request):
     recent_content = Content.objects.all().order_by('-created_at')[:5]
 
     context = {
-        'stats': {
-            'total_screens': total_screens,
-            'online_screens': online_screens,
-            'total_content': total_content,
-            'active_content': active_content,
-            'total_playlists': total_playlists,
-            'active_playlists': active_playlists,
-            'views_today': 0,  # À implémenter avec analytics
-        },
+        'stats': stats,
         'recent_screens': recent_screens,
         'recent_content': recent_content,
-        'screens_count': total_screens,
+        'screens_count': stats['total_screens'],
     }
 
     return render(request, 'dashboard.html', context)
@@ -53,20 +42,43 @@ def analytics(request):
     """Vue de la page analytics"""
 
     # Statistiques pour les KPIs
-    active_playlists_count = Playlist.objects.filter(is_active=True).count()
-    scheduled_playlists_count = Playlist.objects.exclude(
-        start_date__isnull=True
-    ).count()
-    total_contents_count = Content.objects.count()
-    assigned_screens_count = Screen.objects.exclude(
-        Q(playlists__isnull=True)
-    ).distinct().count()
+    stats = get_stats()
 
     context = {
-        'active_playlists_count': active_playlists_count,
-        'scheduled_playlists_count': scheduled_playlists_count,
-        'total_contents_count': total_contents_count,
-        'assigned_screens_count': assigned_screens_count,
+        'active_playlists_count': stats['active_playlists'],
+        'scheduled_playlists_count': stats['scheduled_playlists'],
+        'total_contents_count': stats['total_content'],
+        'assigned_screens_count': stats['assigned_screens'],
     }
 
     return render(request, 'analytics.html', context)
+
+
+@login_required
+def analytics_data(request):
+    """
+    Séries de diffusions pour les graphiques, lues dans les agrégats (PlayRollup).
+
+    Paramètres : period (hour|day), dimension (content|screen|playlist),
+    start / end (AAAA-MM-JJ, 7 derniers jours par défaut), limit (objets les plus diffusés).
+    """
+    period = request.GET.get('period', RollupPeriod.DAY)
+    dimension = request.GET.get('dimension', RollupDimension.CONTENT)
+    if period not in RollupPeriod.values or dimension not in RollupDimension.values:
+        return JsonResponse({'error': 'Paramètre period ou dimension invalide'}, status=400)
+
+    today = timezone.localdate()
+    try:
+        end = parse_date(request.GET.get('end') or '') or today
+        start = parse_date(request.GET.get('start') or '') or end - timedelta(days=6)
+        limit = min(max(int(request.GET.get('limit', 5)), 1), 50)
+    except ValueError:
+        return JsonResponse({'error': 'Paramètres invalides'}, status=400)
+    if start > end or (end - start).days >= ANALYTICS_MAX_DAYS[period]:
+        return JsonResponse({'error': 'Intervalle invalide'}, status=400)
+
+    data = play_series(period, dimension, *day_range(start, end), limit=limit)
+    state = rollup_state()
+    # Fraîcheur des agrégats (dernier passage de rollup_plays)
+    data['rolled_up_at'] = state.updated_at.isoformat() if state else None
+    return JsonResponse(data)
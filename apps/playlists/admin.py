@@ -1,5 +1,38 @@
+from django import forms
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.template.response import TemplateResponse
+from django.urls import path
+from apps.screens.models import Screen
 from .models import Playlist, PlaylistItem
+from .schedule import mask_to_weekdays, weekdays_to_mask
+from .timeline import FleetTimeline
+
+
+# Écrans par page dans la vue calendrier du parc
+TIMELINE_SCREENS_PER_PAGE = 50
+
+
+WEEKDAY_CHOICES = [(0, 'Lundi'), (1, 'Mardi'), (2, 'Mercredi'), (3, 'Jeudi'),
+                   (4, 'Vendredi'), (5, 'Samedi'), (6, 'Dimanche')]
+
+
+class PlaylistAdminForm(forms.ModelForm):
+    weekdays_mask = forms.TypedMultipleChoiceField(
+        choices=WEEKDAY_CHOICES, coerce=int, required=False,
+        widget=forms.CheckboxSelectMultiple, label="Jours de la semaine"
+    )
+    
+    class Meta:
+        model = Playlist
+        fields = '__all__'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial['weekdays_mask'] = mask_to_weekdays(self.instance.weekdays_mask)
+    
+    def clean_weekdays_mask(self):
+        return weekdays_to_mask(self.cleaned_data['weekdays_mask'])
 
 
 class PlaylistItemInline(admin.TabularInline):
@@ -10,6 +43,7 @@ class PlaylistItemInline(admin.TabularInline):
 
 @admin.register(Playlist)
 class PlaylistAdmin(admin.ModelAdmin):
+    form = PlaylistAdminForm
     list_display = ['name', 'is_active', 'priority', 'screen_count', 
                    'start_date', 'end_date', 'created_at']
     list_filter = ['is_active', 'created_at']
@@ -26,7 +60,7 @@ class PlaylistAdmin(admin.ModelAdmin):
             'fields': ('screens',)
         }),
         ('Planification', {
-            'fields': ('start_date', 'end_date', 'start_time', 'end_time', 'weekdays'),
+            'fields': ('start_date', 'end_date', 'start_time', 'end_time', 'weekdays_mask'),
             'classes': ('collapse',)
         }),
         ('Dates', {
@@ -38,6 +72,54 @@ class PlaylistAdmin(admin.ModelAdmin):
     def screen_count(self, obj):
         return obj.screens.count()
     screen_count.short_description = 'Nombre d\'écrans'
+    
+    change_list_template = 'admin/playlists/playlist/change_list.html'
+    
+    def get_urls(self):
+        return [
+            path('timeline/', self.admin_site.admin_view(self.timeline_view),
+                 name='playlists_playlist_timeline'),
+        ] + super().get_urls()
+    
+    def timeline_view(self, request):
+        """Calendrier de diffusion du parc sur une période (une page d'écrans à la fois)"""
+        context = dict(self.admin_site.each_context(request), title="Calendrier de diffusion",
+                       opts=self.model._meta)
+        try:
+            engine = FleetTimeline.parse_range(request.GET.get('start'), request.GET.get('end'))
+        except ValueError as exc:
+            context['error'] = str(exc)
+            return TemplateResponse(request, 'admin/playlists/timeline.html', context)
+        
+        screens = Screen.objects.order_by('name')
+        query = request.GET.get('q', '')
+        if query:
+            screens = screens.filter(name__icontains=query)
+        page = Paginator(screens.values_list('pk', flat=True), TIMELINE_SCREENS_PER_PAGE).get_page(
+            request.GET.get('page'))
+        engine.compute(list(page.object_list))
+        
+        span = (engine.end - engine.start).total_seconds()
+        rows = []
+        for screen_id, segments in engine.timelines.items():
+            bars = []
+            for opening, closing, playlist_id in segments:
+                name = engine.playlists[playlist_id]['name']
+                bars.append({
+                    'name': name,
+                    'start': opening,
+                    'end': closing,
+                    'left': (opening - engine.start).total_seconds() / span * 100,
+                    'width': (closing - opening).total_seconds() / span * 100,
+                    'hue': int(playlist_id.hex[:4], 16) % 360,
+                })
+            rows.append({'id': screen_id, 'name': engine.screens[screen_id], 'bars': bars})
+        
+        params = request.GET.copy()
+        params.pop('page', None)
+        context.update(engine=engine, rows=rows, page=page, query=query, params=params.urlencode(),
+                       start=engine.start, end=engine.end)
+        return TemplateResponse(request, 'admin/playlists/timeline.html', context)
 
 
 @admin.register(PlaylistItem)
@@ -5,3 +5,6 @@ class PlaylistsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.playlists'
     verbose_name = 'Playlists'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.playlists import manifest
+
+
+class Command(BaseCommand):
+    help = "Affiche les compteurs hit/miss du cache des manifestes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help="Remet les compteurs à zéro après affichage")
+
+    def handle(self, *args, **options):
+        for layer, stats in manifest.get_stats().items():
+            self.stdout.write(
+                f"{layer:<10} hits={stats['hits']:<10} misses={stats['misses']:<10} "
+                f"hit_rate={stats['hit_rate']:.1%}"
+            )
+
+        if options['reset']:
+            manifest.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Compteurs remis à zéro"))
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.playlists.timeline import FleetTimeline
+
+
+class Command(BaseCommand):
+    help = "Calcule ce que chaque écran diffusera sur une période"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="Début (ISO, ex. 2024-05-02T08:00) ; maintenant par défaut")
+        parser.add_argument('--end', help="Fin (ISO) ; début + --hours par défaut")
+        parser.add_argument('--hours', type=float, default=24, help="Durée si --end est absent")
+        parser.add_argument('--screen', action='append', dest='screens', metavar='ID',
+                            help="Limite aux écrans donnés (répétable)")
+        parser.add_argument('--json', action='store_true', help="Sortie JSON")
+
+    def handle(self, *args, **options):
+        try:
+            engine = FleetTimeline.parse_range(options['start'], options['end'], options['hours'])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        engine.compute(options['screens'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(engine.as_dict()))
+            return
+
+        for screen_id, segments in engine.timelines.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{engine.screens[screen_id]} ({screen_id})"))
+            if not segments:
+                self.stdout.write("  (rien à diffuser)")
+            for opening, closing, playlist_id in segments:
+                opening, closing = timezone.localtime(opening), timezone.localtime(closing)
+                self.stdout.write(
+                    f"  {opening:%d/%m %H:%M} → {closing:%d/%m %H:%M}  "
+                    f"{engine.playlists[playlist_id]['name']}"
+                )
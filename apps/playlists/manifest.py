@@ -0,0 +1,430 @@
+"""
+Cache des manifestes envoyés aux écrans.
+
+Quatre niveaux de cache partagés entre les workers (backend `default`) :
+- écran -> clé de l'ensemble de playlists actives qui lui sont assignées
+- ensemble de playlists -> plages de planification triées par priorité,
+  puis index des bascules (recherche par dichotomie, prochaine bascule)
+- playlist -> version du manifeste (ETag)
+- playlist + version -> manifeste sérialisé (ou corps compact pré-rendu)
+
+Toutes les clés contiennent une génération globale, incrémentée par les
+signaux (voir signals.py) : une modification invalide tout le cache d'un coup.
+"""
+import atexit
+import gzip
+import hashlib
+import threading
+import time
+from collections import Counter
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.content.models import Content
+from apps.content.renditions import best_variant
+from .models import Playlist, PlaylistItem
+from .schedule import SCHEDULE_FIELDS, ScheduleIndex, sort_windows, timeline
+
+GENERATION_KEY = 'manifest:generation'
+# Les plages en cache dépendent des champs lus : un changement de SCHEDULE_FIELDS change la clé
+SCHEDULE_SIGNATURE = hashlib.sha1(','.join(SCHEDULE_FIELDS).encode()).hexdigest()[:8]
+STATS_KEY = 'manifest:stats:{layer}:{outcome}'
+STATS_LAYERS = ['screen', 'schedule', 'index', 'version', 'manifest', 'device']
+# Horizon de l'index des bascules, à partir du début du jour courant
+INDEX_HORIZON = timedelta(days=8)
+
+
+def _timeout():
+    return getattr(settings, 'MANIFEST_CACHE_TIMEOUT', 300)
+
+
+def get_generation():
+    """Retourne la génération courante du cache des manifestes"""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Valeur initiale non réutilisable si la clé a été évincée
+        cache.add(GENERATION_KEY, int(time.time() * 1000), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    """Invalide tous les manifestes en cache"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, int(time.time() * 1000), None)
+
+
+class _StatsBuffer:
+    """
+    Compteurs hit/miss en mémoire du worker, ajoutés au cache partagé au plus
+    une fois par MANIFEST_STATS_FLUSH_INTERVAL : pas d'écriture de cache à
+    chaque appel d'écran (coûteuse avec le cache fichier).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._flushed_at = time.monotonic()
+
+    def count(self, layer, outcome):
+        with self._lock:
+            self._counts[(layer, outcome)] += 1
+            due = time.monotonic() - self._flushed_at >= getattr(settings, 'MANIFEST_STATS_FLUSH_INTERVAL', 60)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._flushed_at = time.monotonic()
+        for (layer, outcome), value in counts.items():
+            key = STATS_KEY.format(layer=layer, outcome=outcome)
+            if not cache.add(key, value, None):
+                try:
+                    cache.incr(key, value)
+                except ValueError:
+                    cache.set(key, value, None)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+_stats = _StatsBuffer()
+atexit.register(_stats.flush)
+
+
+def _count(layer, outcome):
+    _stats.count(layer, outcome)
+
+
+def get_stats():
+    """Compteurs hit/miss par niveau de cache (les autres workers publient avec retard)"""
+    _stats.flush()
+    stats = {}
+    for layer in STATS_LAYERS:
+        hits = cache.get(STATS_KEY.format(layer=layer, outcome='hit'), 0)
+        misses = cache.get(STATS_KEY.format(layer=layer, outcome='miss'), 0)
+        total = hits + misses
+        stats[layer] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+        }
+    return stats
+
+
+def reset_stats():
+    _stats.clear()
+    cache.delete_many([
+        STATS_KEY.format(layer=layer, outcome=outcome)
+        for layer in STATS_LAYERS for outcome in ('hit', 'miss')
+    ])
+
+
+def _assignment_key(playlist_ids):
+    joined = ','.join(sorted(str(pk) for pk in playlist_ids))
+    return hashlib.sha1(joined.encode()).hexdigest()
+
+
+def get_screen_assignment(screen, generation):
+    """Clé de l'ensemble des playlists actives assignées à l'écran"""
+    key = f'manifest:{generation}:screen:{screen.pk}'
+    assignment = cache.get(key)
+    if assignment is not None:
+        _count('screen', 'hit')
+        return assignment
+
+    _count('screen', 'miss')
+    playlist_ids = list(Playlist.screens.through.objects.filter(
+        screen_id=screen.pk,
+        playlist__is_active=True
+    ).values_list('playlist_id', flat=True))
+    assignment = {'key': _assignment_key(playlist_ids), 'playlist_ids': playlist_ids}
+    cache.set(key, assignment, _timeout())
+    return assignment
+
+
+def get_schedule(assignment, generation):
+    """Plages de planification de l'ensemble de playlists, triées par priorité"""
+    key = f'manifest:{generation}:schedule:{SCHEDULE_SIGNATURE}:{assignment["key"]}'
+    windows = cache.get(key)
+    if windows is not None:
+        _count('schedule', 'hit')
+        return windows
+
+    _count('schedule', 'miss')
+    windows = sort_windows(Playlist.objects.filter(
+        id__in=assignment['playlist_ids'],
+        is_active=True
+    ).values(*SCHEDULE_FIELDS))
+    cache.set(key, windows, _timeout())
+    return windows
+
+
+def compute_version(window):
+    """Hash stable du contenu d'une playlist : id, ordre des éléments, checksums et dates"""
+    items = PlaylistItem.objects.filter(playlist_id=window['id']).order_by(
+        'order', 'id'
+    ).values_list('order', 'content_id', 'content__checksum', 'content__updated_at')
+
+    digest = hashlib.sha1(f"{window['id']}|{window['updated_at'].isoformat()}".encode())
+    for order, content_id, checksum, updated_at in items:
+        digest.update(f"|{order}:{content_id}:{checksum}:{updated_at.isoformat()}".encode())
+    return digest.hexdigest()
+
+
+def get_playlist_version(window, generation):
+    """Version du manifeste d'une playlist (une requête indexée si absente du cache)"""
+    key = f'manifest:{generation}:version:{window["id"]}'
+    version = cache.get(key)
+    if version is not None:
+        _count('version', 'hit')
+        return version
+
+    _count('version', 'miss')
+    version = compute_version(window)
+    cache.set(key, version, _timeout())
+    return version
+
+
+def get_schedule_index(assignment, generation, now):
+    """Index des bascules de l'ensemble de playlists (reconstruit une fois par jour et par modification)"""
+    day_start = datetime.combine(now.date(), dt_time.min, tzinfo=now.tzinfo)
+    day_end = day_start + timedelta(days=1)
+    key = f'manifest:{generation}:index:{SCHEDULE_SIGNATURE}:{assignment["key"]}:{day_start.date().isoformat()}'
+    index = cache.get(key)
+    if index is not None and index.covers(now):
+        _count('index', 'hit')
+        return index
+
+    _count('index', 'miss')
+    index = ScheduleIndex(get_schedule(assignment, generation), day_start, day_start + INDEX_HORIZON)
+    # La clé contient la génération : l'index reste valable jusqu'à la fin du jour
+    cache.set(key, index, max(int((day_end - now).total_seconds()), 1))
+    return index
+
+
+def resolve_screen(screen, now):
+    """
+    (plage active ou None, prochaine bascule ou None, index) pour l'écran ;
+    index vaut None si aucune playlist active ne lui est assignée.
+    """
+    generation = get_generation()
+    assignment = get_screen_assignment(screen, generation)
+    if not assignment['playlist_ids']:
+        return None, None, None
+
+    index = get_schedule_index(assignment, generation, now)
+    window, next_transition = index.lookup(now)
+    return window, next_transition, index
+
+
+def get_current_state(screen, now):
+    """((id de la playlist active, version) ou None, prochaine bascule ou None)"""
+    window, next_transition, _ = resolve_screen(screen, now)
+    if window is None:
+        return None, next_transition
+
+    return (window['id'], get_playlist_version(window, get_generation())), next_transition
+
+
+def get_current_version(screen, now):
+    """(id de la playlist active, version du manifeste) pour l'écran, ou None"""
+    return get_current_state(screen, now)[0]
+
+
+def get_playlist_manifest(playlist_id, version, request):
+    """Manifeste sérialisé d'une playlist (partagé par tous les écrans)"""
+    from .serializers import PlaylistSerializer
+
+    base_url = request.build_absolute_uri('/')
+    generation = get_generation()
+    key = f'manifest:{generation}:data:{playlist_id}:{version}:{hashlib.sha1(base_url.encode()).hexdigest()}'
+    manifest = cache.get(key)
+    if manifest is not None:
+        _count('manifest', 'hit')
+        return manifest
+
+    _count('manifest', 'miss')
+    try:
+        playlist = PlaylistSerializer.prefetch(Playlist.objects.filter(pk=playlist_id)).get()
+    except Playlist.DoesNotExist:
+        # Playlist supprimée entre-temps : la génération a déjà été incrémentée
+        return None
+    manifest = PlaylistSerializer(playlist, context={'request': request}).data
+    cache.set(key, manifest, _timeout())
+    return manifest
+
+
+def build_device_manifest(playlist_id, version, request, resolution=None):
+    """
+    Manifeste compact : uniquement ce dont le lecteur a besoin pour la diffusion.
+    Pour les images, l'URL pointe vers la variante adaptée à la résolution de l'écran.
+    """
+    rows = PlaylistItem.objects.filter(
+        playlist_id=playlist_id,
+        content__is_active=True
+    ).order_by('order', 'id').values_list(
+        'order', 'content_id', 'content__content_type', 'content__file', 'content__url',
+        'content__duration', 'content__file_size', 'content__checksum', 'content__variants'
+    )
+
+    storage = Content._meta.get_field('file').storage
+    items = []
+    for order, content_id, content_type, file, url, duration, size, checksum, variants in rows:
+        variant = best_variant(variants, resolution) if content_type == 'image' else None
+        if variant:
+            file, size, checksum = variant['name'], variant['size'], variant['checksum']
+        items.append({
+            'id': str(content_id),
+            'type': content_type,
+            'url': request.build_absolute_uri(storage.url(file)) if file else url,
+            'duration': duration,
+            'size': size,
+            'checksum': checksum,
+            'order': order,
+        })
+
+    return {'playlist_id': str(playlist_id), 'version': version, 'items': items}
+
+
+def _resolution_key(resolution):
+    return f'{resolution[0]}x{resolution[1]}' if resolution else 'original'
+
+
+def _snapshot_key(version, request, resolution=None):
+    base_url = request.build_absolute_uri('/')
+    return (f'manifest:snapshot:{version}:{_resolution_key(resolution)}:'
+            f'{hashlib.sha1(base_url.encode()).hexdigest()}')
+
+
+def _remember_snapshot(playlist_id, key):
+    """Historique borné des instantanés d'une playlist : les plus anciens sont évincés"""
+    limit = getattr(settings, 'MANIFEST_SNAPSHOT_HISTORY', 10)
+    history_key = f'manifest:snapshots:{playlist_id}'
+    history = cache.get(history_key) or []
+    if key in history:
+        return
+
+    history.append(key)
+    if len(history) > limit:
+        cache.delete_many(history[:-limit])
+        history = history[-limit:]
+    cache.set(history_key, history, None)
+
+
+def get_device_snapshot(playlist_id, version, request, resolution=None):
+    """Instantané immuable du manifeste compact d'une version donnée"""
+    key = _snapshot_key(version, request, resolution)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_device_manifest(playlist_id, version, request, resolution)
+        cache.set(key, snapshot, getattr(settings, 'MANIFEST_SNAPSHOT_TIMEOUT', 7 * 24 * 3600))
+        _remember_snapshot(playlist_id, key)
+    return snapshot
+
+
+def compute_delta(base, target):
+    """Différence entre deux manifestes compacts : ajouts, retraits, réordonnancements, modifications"""
+    base_items = {item['id']: item for item in base['items']}
+    target_items = {item['id']: item for item in target['items']}
+
+    added, changed, reordered = [], [], []
+    for content_id, item in target_items.items():
+        previous = base_items.get(content_id)
+        if previous is None:
+            added.append(item)
+        elif any(previous[field] != item[field] for field in item if field != 'order'):
+            changed.append(item)
+        elif previous['order'] != item['order']:
+            reordered.append({'id': content_id, 'order': item['order']})
+
+    return {
+        'playlist_id': target['playlist_id'],
+        'version': target['version'],
+        'base_version': base['version'],
+        'delta': True,
+        'added': added,
+        'removed': [content_id for content_id in base_items if content_id not in target_items],
+        'changed': changed,
+        'reordered': reordered,
+    }
+
+
+def get_device_manifest_body(playlist_id, version, request, renderer, gzipped=False, since=None,
+                             resolution=None):
+    """
+    Corps pré-rendu (JSON ou MessagePack, éventuellement gzip) du manifeste compact.
+    Si `since` est fourni et que son instantané est encore en cache, seul le delta est envoyé ;
+    sinon le manifeste complet sert de repli. Un corps par résolution d'écran (variantes d'images).
+    """
+    base_url = request.build_absolute_uri('/')
+    generation = get_generation()
+    key = (f'manifest:{generation}:device:{playlist_id}:{version}:{since or ""}:{renderer.format}:'
+           f'{int(gzipped)}:{_resolution_key(resolution)}:{hashlib.sha1(base_url.encode()).hexdigest()}')
+    body = cache.get(key)
+    if body is not None:
+        _count('device', 'hit')
+        return body
+
+    _count('device', 'miss')
+    data = get_device_snapshot(playlist_id, version, request, resolution)
+    if since:
+        base = cache.get(_snapshot_key(since, request, resolution))
+        data = compute_delta(base, data) if base is not None else dict(data, delta=False)
+
+    body = renderer.render(data)
+    if gzipped:
+        body = gzip.compress(body, compresslevel=6)
+    cache.set(key, body, _timeout())
+    return body
+
+
+def get_prefetch_manifest(screen, start, end, request):
+    """
+    Tout ce dont l'écran aura besoin entre start et end : plages de diffusion
+    successives et contenus (tailles, checksums), triés par instant du premier
+    besoin, pour un préchargement pendant les périodes creuses.
+    """
+    generation = get_generation()
+    assignment = get_screen_assignment(screen, generation)
+    windows = get_schedule(assignment, generation) if assignment['playlist_ids'] else []
+
+    schedule = []
+    items = {}
+    for segment in timeline(windows, start, end):
+        window = segment['window']
+        if window is None:
+            continue
+
+        version = get_playlist_version(window, generation)
+        schedule.append({
+            'playlist_id': str(window['id']),
+            'version': version,
+            'priority': window['priority'],
+            'start': segment['start'].isoformat(),
+            'end': segment['end'].isoformat(),
+        })
+
+        # Instantanés partagés avec le manifeste compact (variantes comprises)
+        snapshot = get_device_snapshot(window['id'], version, request, screen.resolution)
+        for item in snapshot['items']:
+            if item['id'] not in items:
+                items[item['id']] = {
+                    **{field: value for field, value in item.items() if field != 'order'},
+                    'playlist_id': str(window['id']),
+                    'first_needed_at': segment['start'].isoformat(),
+                }
+
+    return {
+        'generated_at': start.isoformat(),
+        'horizon_end': end.isoformat(),
+        'schedule': schedule,
+        'items': list(items.values()),
+        'total_size': sum(item['size'] or 0 for item in items.values()),
+    }
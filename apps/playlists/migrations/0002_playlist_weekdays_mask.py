@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+
+def weekdays_to_mask(weekdays):
+    """'0,1,2' -> 7 ; NULL signifiait tous les jours (ancien filtre weekdays__isnull)"""
+    if weekdays is None:
+        return 127
+    days = {int(day) for day in weekdays.split(',') if day.strip().isdigit()}
+    return sum(1 << day for day in days if 0 <= day <= 6)
+
+
+def csv_to_mask(apps, schema_editor):
+    Playlist = apps.get_model('playlists', 'Playlist')
+    for playlist in Playlist.objects.only('pk', 'weekdays').iterator():
+        playlist.weekdays_mask = weekdays_to_mask(playlist.weekdays)
+        playlist.save(update_fields=['weekdays_mask'])
+
+
+def mask_to_csv(apps, schema_editor):
+    Playlist = apps.get_model('playlists', 'Playlist')
+    for playlist in Playlist.objects.only('pk', 'weekdays_mask').iterator():
+        playlist.weekdays = ','.join(str(day) for day in range(7) if playlist.weekdays_mask & (1 << day))
+        playlist.save(update_fields=['weekdays'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playlist',
+            name='weekdays_mask',
+            field=models.PositiveSmallIntegerField(default=127, help_text='Masque de bits : 1=Lundi, 2=Mardi, ..., 64=Dimanche', verbose_name='Jours de la semaine'),
+        ),
+        migrations.RunPython(csv_to_mask, mask_to_csv),
+        migrations.RemoveField(
+            model_name='playlist',
+            name='weekdays',
+        ),
+    ]
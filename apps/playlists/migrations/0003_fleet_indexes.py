@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+# Table d'association auto-générée : pas de Meta.indexes, index ajouté directement.
+# (screen_id, playlist_id) couvre la résolution des playlists d'un écran ;
+# l'index unique (playlist_id, screen_id) de Django couvre l'autre sens.
+SCREEN_ASSIGNMENT_INDEX = models.Index(fields=['screen', 'playlist'], name='playlist_screens_screen_idx')
+
+
+def _through(apps):
+    return apps.get_model('playlists', 'Playlist')._meta.get_field('screens').remote_field.through
+
+
+def add_assignment_index(apps, schema_editor):
+    schema_editor.add_index(_through(apps), SCREEN_ASSIGNMENT_INDEX)
+
+
+def remove_assignment_index(apps, schema_editor):
+    schema_editor.remove_index(_through(apps), SCREEN_ASSIGNMENT_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('playlists', '0002_playlist_weekdays_mask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='playlist',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-priority', '-created_at'], name='playlist_active_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playlist',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='playlist_active_created_idx'),
+        ),
+        migrations.RunPython(add_assignment_index, remove_assignment_index),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from apps.screens.models import Screen
 from apps.content.models import Content
+from .schedule import ALL_WEEKDAYS, weekdays_csv, weekdays_to_mask
 import uuid
 
 
@@ -17,9 +18,10 @@ class Playlist(models.Model):
     start_time = models.TimeField(null=True, blank=True, verbose_name="Heure de début")
     end_time = models.TimeField(null=True, blank=True, verbose_name="Heure de fin")
     
-    # Jours de la semaine (0=lundi, 6=dimanche)
-    weekdays = models.CharField(max_length=50, default='0,1,2,3,4,5,6', verbose_name="Jours de la semaine",
-                               help_text="0=Lundi, 6=Dimanche. Séparés par des virgules")
+    # Jours de la semaine : bit n = jour n (0=lundi, 6=dimanche), 127 = tous les jours
+    weekdays_mask = models.PositiveSmallIntegerField(default=ALL_WEEKDAYS,
+                                                     verbose_name="Jours de la semaine",
+                                                     help_text="Masque de bits : 1=Lundi, 2=Mardi, ..., 64=Dimanche")
     
     priority = models.IntegerField(default=0, verbose_name="Priorité",
                                   help_text="Plus le nombre est élevé, plus la priorité est haute")
@@ -30,10 +32,26 @@ class Playlist(models.Model):
         ordering = ['-priority', '-created_at']
         verbose_name = "Playlist"
         verbose_name_plural = "Playlists"
+        indexes = [
+            # Index partiels : seules les playlists actives sont planifiées et listées
+            models.Index(fields=['-priority', '-created_at'], condition=models.Q(is_active=True),
+                         name='playlist_active_priority_idx'),
+            models.Index(fields=['-created_at'], condition=models.Q(is_active=True),
+                         name='playlist_active_created_idx'),
+        ]
     
     def __str__(self):
         return self.name
 
+    @property
+    def weekdays(self):
+        """Ancien format '0,1,2' (lecture et écriture)"""
+        return weekdays_csv(self.weekdays_mask)
+
+    @weekdays.setter
+    def weekdays(self, value):
+        self.weekdays_mask = weekdays_to_mask(value)
+
     @property
     def contents(self):
         """Retourne un queryset des contenus de la playlist triés par ordre"""
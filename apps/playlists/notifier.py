@@ -0,0 +1,77 @@
+"""
+Notification des changements de manifestes aux connexions SSE en attente.
+
+Les signaux du processus courant réveillent directement les connexions
+(`notify`). Les modifications faites par un autre processus (workers WSGI
+de l'interface web) sont détectées en surveillant la génération du cache
+partagé : une seule tâche par boucle asyncio, quel que soit le nombre de
+connexions ouvertes.
+"""
+import asyncio
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import manifest
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class ManifestNotifier:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = set()
+        self._pollers = {}
+
+    def notify(self):
+        """Réveille toutes les connexions en attente (appelable depuis n'importe quel thread)"""
+        with self._lock:
+            waiters, self._waiters = self._waiters, set()
+        for loop, future in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_wake, future)
+
+    async def wait(self, timeout):
+        """Attend une notification ; retourne False si le délai expire"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            self._waiters.add(waiter)
+        self._ensure_poller(loop)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def _ensure_poller(self, loop):
+        poller = self._pollers.get(loop)
+        if poller is None or poller.done():
+            self._pollers[loop] = loop.create_task(self._poll_generation(loop))
+
+    def _has_waiters(self, loop):
+        with self._lock:
+            return any(waiter_loop is loop for waiter_loop, _ in self._waiters)
+
+    async def _poll_generation(self, loop):
+        """Surveille la génération du cache tant que des connexions attendent"""
+        interval = getattr(settings, 'MANIFEST_NOTIFIER_POLL_INTERVAL', 1.0)
+        get_generation = sync_to_async(manifest.get_generation, thread_sensitive=False)
+        generation = await get_generation()
+        while self._has_waiters(loop):
+            await asyncio.sleep(interval)
+            current = await get_generation()
+            if current != generation:
+                generation = current
+                self.notify()
+
+
+manifest_notifier = ManifestNotifier()
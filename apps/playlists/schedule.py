@@ -0,0 +1,214 @@
+"""
+Évaluation de la planification des playlists (dates, heures, jours de la semaine)
+"""
+import heapq
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+# Une plage reste active jusqu'à end_time inclus : elle cesse juste après
+END_EPSILON = timedelta(microseconds=1)
+
+# Champs nécessaires pour évaluer la planification d'une playlist
+SCHEDULE_FIELDS = ['id', 'priority', 'start_date', 'end_date', 'start_time',
+                   'end_time', 'weekdays_mask', 'created_at', 'updated_at']
+
+# Masque des jours de la semaine : bit n = jour n (0=lundi, 6=dimanche)
+ALL_WEEKDAYS = 0b1111111
+
+
+def parse_weekdays(weekdays):
+    """Convertit la chaîne '0,1,2' en ensemble d'entiers"""
+    return {int(day) for day in (weekdays or '').split(',') if day.strip().isdigit()}
+
+
+def weekdays_to_mask(weekdays):
+    """Masque depuis l'ancien format '0,1,2', une liste de jours ou un masque entier"""
+    if isinstance(weekdays, bool):
+        raise TypeError("Jours de la semaine invalides")
+    if isinstance(weekdays, int):
+        if not 0 <= weekdays <= ALL_WEEKDAYS:
+            raise ValueError(f"Masque de jours invalide : {weekdays}")
+        return weekdays
+    days = parse_weekdays(weekdays) if isinstance(weekdays, str) else {int(day) for day in weekdays}
+    if any(not 0 <= day <= 6 for day in days):
+        raise ValueError("Les jours vont de 0 (lundi) à 6 (dimanche)")
+    return sum(1 << day for day in days)
+
+
+def mask_to_weekdays(mask):
+    """Jours (0=lundi) présents dans le masque, triés"""
+    return [day for day in range(7) if mask & (1 << day)]
+
+
+def weekdays_csv(mask):
+    """Ancien format '0,1,2' (compatibilité de l'API et des templates)"""
+    return ','.join(str(day) for day in mask_to_weekdays(mask))
+
+
+def is_scheduled(window, now):
+    """Indique si une plage de planification est active à l'instant donné"""
+    current_date = now.date()
+    current_time = now.time()
+
+    if window['start_date'] and window['start_date'] > current_date:
+        return False
+    if window['end_date'] and window['end_date'] < current_date:
+        return False
+    if window['start_time'] and window['start_time'] > current_time:
+        return False
+    if window['end_time'] and window['end_time'] < current_time:
+        return False
+    return bool(window['weekdays_mask'] & (1 << now.weekday()))
+
+
+def sort_windows(windows):
+    """Trie les plages par priorité décroissante puis par date de création"""
+    return sorted(windows, key=lambda w: (w['priority'], w['created_at']), reverse=True)
+
+
+def resolve(windows, now):
+    """Retourne la plage gagnante à l'instant donné (windows déjà triées) ou None"""
+    for window in windows:
+        if is_scheduled(window, now):
+            return window
+    return None
+
+
+def change_points(windows, start, end):
+    """
+    Instants de ]start, end[ où le résultat de resolve() peut changer :
+    minuits (dates, jours de la semaine) et bornes horaires des plages.
+    """
+    tzinfo = start.tzinfo
+    times = {time.min}
+    for window in windows:
+        if window['start_time']:
+            times.add(window['start_time'])
+    end_times = {window['end_time'] for window in windows if window['end_time']}
+
+    points = set()
+    day = start.date()
+    while day <= end.date():
+        for moment in times:
+            points.add(datetime.combine(day, moment, tzinfo=tzinfo))
+        for moment in end_times:
+            points.add(datetime.combine(day, moment, tzinfo=tzinfo) + END_EPSILON)
+        day += timedelta(days=1)
+    return sorted(point for point in points if start < point < end)
+
+
+def timeline(windows, start, end):
+    """
+    Plages gagnantes successives entre start et end (windows déjà triées) :
+    liste de {'window', 'start', 'end'}, window valant None quand rien n'est diffusé.
+    """
+    segments = []
+    for point in [start] + change_points(windows, start, end):
+        window = resolve(windows, point)
+        if segments and segments[-1]['window'] is window:
+            continue
+        if segments:
+            segments[-1]['end'] = point
+        segments.append({'window': window, 'start': point, 'end': end})
+    return segments
+
+
+def active_intervals(window, start, end):
+    """
+    Intervalles [début, fin[ pendant lesquels une plage est active entre start
+    et end (mêmes règles que is_scheduled), fusionnés quand ils se touchent.
+    """
+    tzinfo = start.tzinfo
+    mask = window['weekdays_mask']
+    first_day = max(start.date(), window['start_date'] or start.date())
+    last_day = min(end.date(), window['end_date'] or end.date())
+
+    intervals = []
+    day = first_day
+    while day <= last_day:
+        if mask & (1 << day.weekday()):
+            opening = datetime.combine(day, window['start_time'] or time.min, tzinfo=tzinfo)
+            if window['end_time']:
+                closing = datetime.combine(day, window['end_time'], tzinfo=tzinfo) + END_EPSILON
+            else:
+                closing = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tzinfo)
+            opening, closing = max(opening, start), min(closing, end)
+            if opening < closing:
+                if intervals and intervals[-1][1] == opening:
+                    intervals[-1] = (intervals[-1][0], closing)
+                else:
+                    intervals.append((opening, closing))
+        day += timedelta(days=1)
+    return intervals
+
+
+def sweep(ranked_intervals):
+    """
+    Segments (début, fin, id) de la playlist gagnante à partir de
+    [(rang, id, intervalles)] ; le rang le plus faible l'emporte (ordre de resolve).
+    """
+    events = defaultdict(list)
+    for rank, playlist_id, intervals in ranked_intervals:
+        for opening, closing in intervals:
+            events[opening].append((1, rank, playlist_id))
+            events[closing].append((-1, rank, playlist_id))
+
+    segments = []
+    heap, ended = [], defaultdict(int)
+    current = None
+    for moment in sorted(events):
+        for change, rank, playlist_id in events[moment]:
+            if change > 0:
+                heapq.heappush(heap, (rank, playlist_id))
+            else:
+                ended[rank] += 1
+        # Suppression paresseuse des plages terminées en tête du tas
+        while heap and ended[heap[0][0]]:
+            ended[heap[0][0]] -= 1
+            heapq.heappop(heap)
+
+        winner = heap[0][1] if heap else None
+        if winner != current:
+            if current is not None:
+                segments[-1] = (segments[-1][0], moment, current)
+            if winner is not None:
+                segments.append((moment, None, winner))
+            current = winner
+    return segments
+
+
+class ScheduleIndex:
+    """
+    Index des bascules d'un ensemble de plages sur [start, end[ : segments
+    triés de la plage gagnante, construit une fois par modification et
+    interrogé par dichotomie (O(log n)) au lieu de réévaluer chaque plage.
+    """
+
+    def __init__(self, windows, start, end):
+        self.start = start
+        self.end = end
+        self.windows = {window['id']: window for window in windows}
+        # Ordre de resolve() : priorité décroissante puis création
+        self.ranking = [window['id'] for window in windows]
+        self.segments = sweep([
+            (rank, window['id'], active_intervals(window, start, end))
+            for rank, window in enumerate(windows)
+        ])
+        self.starts = [segment[0] for segment in self.segments]
+
+    def covers(self, now):
+        return self.start <= now < self.end
+
+    def lookup(self, now):
+        """
+        (plage gagnante ou None, instant de la prochaine bascule) ; la bascule
+        vaut None si elle est au-delà de l'horizon de l'index.
+        """
+        position = bisect_right(self.starts, now) - 1
+        if position >= 0 and now < self.segments[position][1]:
+            _, closing, playlist_id = self.segments[position]
+            return self.windows[playlist_id], (closing if closing < self.end else None)
+
+        following = position + 1
+        return None, (self.starts[following] if following < len(self.starts) else None)
@@ -1,6 +1,22 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Playlist, PlaylistItem
+from .schedule import weekdays_csv, weekdays_to_mask
 from apps.content.serializers import ContentSerializer
+from apps.screens.models import Screen
+
+
+class WeekdaysField(serializers.Field):
+    """Jours de la semaine : '0,1,2' en sortie (compatibilité), chaîne, liste ou masque en entrée"""
+    
+    def to_representation(self, mask):
+        return weekdays_csv(mask)
+    
+    def to_internal_value(self, data):
+        try:
+            return weekdays_to_mask(data)
+        except (TypeError, ValueError) as exc:
+            raise serializers.ValidationError(str(exc) or "Jours de la semaine invalides")
 
 
 class PlaylistItemSerializer(serializers.ModelSerializer):
@@ -15,16 +31,33 @@ class PlaylistItemSerializer(serializers.ModelSerializer):
 class PlaylistSerializer(serializers.ModelSerializer):
     items = PlaylistItemSerializer(many=True, read_only=True)
     screen_count = serializers.SerializerMethodField()
+    weekdays = WeekdaysField(source='weekdays_mask', required=False)
     
     class Meta:
         model = Playlist
         fields = ['id', 'name', 'description', 'screens', 'is_active',
                   'start_date', 'end_date', 'start_time', 'end_time',
-                  'weekdays', 'priority', 'items', 'screen_count',
+                  'weekdays', 'weekdays_mask', 'priority', 'items', 'screen_count',
                   'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'weekdays_mask', 'created_at', 'updated_at']
+    
+    @classmethod
+    def prefetch(cls, queryset):
+        """Charge éléments, contenus et écrans en requêtes groupées (pas de N+1)"""
+        return queryset.prefetch_related(
+            Prefetch('items', queryset=PlaylistItem.objects.select_related('content')),
+            Prefetch('screens', queryset=cls.screens_queryset())
+        )
+    
+    @staticmethod
+    def screens_queryset():
+        # screens (clés primaires) et screen_count n'utilisent que l'id
+        return Screen.objects.only('id')
     
     def get_screen_count(self, obj):
+        # Écrans préchargés par prefetch() (pas d'annotation : un GROUP BY perdrait Meta.ordering)
+        if 'screens' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.screens.all())
         return obj.screens.count()
 
 
@@ -32,3 +65,8 @@ class PlaylistDetailSerializer(PlaylistSerializer):
     """Serializer avec plus de détails pour la vue détaillée"""
     from apps.screens.serializers import ScreenSerializer
     screens = ScreenSerializer(many=True, read_only=True)
+
+    @staticmethod
+    def screens_queryset():
+        # ScreenSerializer lit tous les champs : pas de chargement différé par écran
+        return Screen.objects.all()
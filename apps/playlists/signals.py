@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.content.models import Content
+from .models import Playlist, PlaylistItem
+from . import manifest
+from .notifier import manifest_notifier
+
+
+@receiver(post_save, sender=Playlist)
+@receiver(post_delete, sender=Playlist)
+@receiver(post_save, sender=PlaylistItem)
+@receiver(post_delete, sender=PlaylistItem)
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def invalidate_manifests(sender, **kwargs):
+    """Invalide le cache des manifestes après toute modification"""
+    # Après le commit : un écran lisant avant ne doit pas mettre en cache
+    # l'ancien état sous la nouvelle génération, ni être réveillé pour le relire
+    transaction.on_commit(manifest.bump_generation)
+    transaction.on_commit(manifest_notifier.notify)
+
+
+@receiver(m2m_changed, sender=Playlist.screens.through)
+def invalidate_manifests_on_assignment(sender, action, **kwargs):
+    """Invalide le cache quand les écrans assignés à une playlist changent"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(manifest.bump_generation)
+        transaction.on_commit(manifest_notifier.notify)
@@ -0,0 +1,167 @@
+from importlib import import_module
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from apps.content.models import Content
+from apps.screens.models import Screen
+from . import manifest
+from .models import Playlist, PlaylistItem
+from .notifier import manifest_notifier
+from .serializers import PlaylistSerializer, WeekdaysField
+
+
+class PlaylistListQueryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='x'))
+        self.screens = [Screen.objects.create(name=f"Écran {i}", location="Test") for i in range(3)]
+        self.contents = [Content.objects.create(title=f"Image {i}", content_type='image') for i in range(3)]
+
+    def create_playlists(self, count):
+        for index in range(count):
+            playlist = Playlist.objects.create(name=f"Playlist {index}", priority=index % 3)
+            for order, content in enumerate(self.contents):
+                PlaylistItem.objects.create(playlist=playlist, content=content, order=order)
+            playlist.screens.set(self.screens)
+
+    def list_query_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/playlists/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data['results']
+
+    def test_query_count_does_not_grow_with_playlists(self):
+        self.create_playlists(2)
+        few, _ = self.list_query_count()
+
+        self.create_playlists(8)
+        with self.assertNumQueries(few):
+            response = self.client.get('/api/playlists/')
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual({item['screen_count'] for item in response.data['results']}, {3})
+
+    def test_screens_prefetch_loads_ids_only(self):
+        self.create_playlists(2)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/playlists/')
+        screen_queries = [query['sql'] for query in queries if 'FROM "screens_screen"' in query['sql']]
+        self.assertEqual(len(screen_queries), 1)
+        self.assertNotIn('"device_info"', screen_queries[0])
+
+    def test_retrieve_query_count_does_not_grow_with_screens(self):
+        self.create_playlists(1)
+        playlist = Playlist.objects.get()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/api/playlists/{playlist.pk}/')
+        few = len(queries)
+
+        playlist.screens.add(*[Screen.objects.create(name=f"Écran {i}", location="Test") for i in range(3, 8)])
+        with self.assertNumQueries(few):
+            response = self.client.get(f'/api/playlists/{playlist.pk}/')
+        self.assertEqual(len(response.data['screens']), 8)
+        self.assertIn('location', response.data['screens'][0])
+
+    def test_list_keeps_priority_ordering(self):
+        self.create_playlists(6)
+        _, results = self.list_query_count()
+        priorities = [item['priority'] for item in results]
+        self.assertEqual(priorities, sorted(priorities, reverse=True))
+
+
+class ManifestStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        manifest.reset_stats()
+
+    @override_settings(MANIFEST_STATS_FLUSH_INTERVAL=3600)
+    def test_counters_are_buffered_until_flush(self):
+        for _ in range(100):
+            manifest._count('screen', 'hit')
+        manifest._count('screen', 'miss')
+        self.assertIsNone(cache.get(manifest.STATS_KEY.format(layer='screen', outcome='hit')))
+
+        stats = manifest.get_stats()['screen']
+        self.assertEqual((stats['hits'], stats['misses']), (100, 1))
+
+
+class ManifestInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generation_is_bumped_after_commit(self):
+        before = manifest.get_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            playlist = Playlist.objects.create(name="Matin")
+            playlist.screens.add(Screen.objects.create(name="Accueil", location="Hall"))
+            # Avant le commit, un écran doit encore lire (et cacher) sous l'ancienne génération
+            self.assertEqual(manifest.get_generation(), before)
+        self.assertNotEqual(manifest.get_generation(), before)
+
+    def test_screens_are_notified_after_commit(self):
+        with mock.patch.object(manifest_notifier, 'notify') as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                Playlist.objects.create(name="Matin")
+                notify.assert_not_called()
+            notify.assert_called()
+
+
+class WeekdaysMigrationTests(TransactionTestCase):
+    migrate_from = [('playlists', '0001_initial')]
+    migrate_to = [('playlists', '0002_playlist_weekdays_mask')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        self.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_csv_to_mask_and_back(self):
+        old_apps = self.migrate(self.migrate_from)
+        OldPlaylist = old_apps.get_model('playlists', 'Playlist')
+        for name, weekdays in (('semaine', '0,1,2'), ('vide', ''), ('tous', '0,1,2,3,4,5,6'),
+                               ('espaces', ' 4, 6,x,9')):
+            OldPlaylist.objects.create(name=name, weekdays=weekdays)
+
+        new_apps = self.migrate(self.migrate_to)
+        masks = dict(new_apps.get_model('playlists', 'Playlist').objects.values_list('name', 'weekdays_mask'))
+        self.assertEqual(masks, {'semaine': 7, 'vide': 0, 'tous': 127, 'espaces': 80})
+
+        old_apps = self.migrate(self.migrate_from)
+        weekdays = dict(old_apps.get_model('playlists', 'Playlist').objects.values_list('name', 'weekdays'))
+        self.assertEqual(weekdays, {'semaine': '0,1,2', 'vide': '', 'tous': '0,1,2,3,4,5,6', 'espaces': '4,6'})
+
+    def test_null_means_every_day(self):
+        migration = import_module('apps.playlists.migrations.0002_playlist_weekdays_mask')
+        self.assertEqual(migration.weekdays_to_mask(None), 127)
+
+
+class WeekdaysFieldTests(TestCase):
+    def test_input(self):
+        field = WeekdaysField()
+        self.assertEqual(field.run_validation('0,1,2'), 7)
+        self.assertEqual(field.run_validation([5, 6]), 96)
+        self.assertEqual(field.run_validation(''), 0)
+        for invalid in (None, '7', 128, True):
+            with self.subTest(value=invalid), self.assertRaises(ValidationError):
+                field.run_validation(invalid)
+
+    def test_output_round_trip(self):
+        playlist = Playlist.objects.create(name="Semaine", weekdays_mask=31)
+        data = PlaylistSerializer(playlist).data
+        self.assertEqual(data['weekdays'], '0,1,2,3,4')
+
+        serializer = PlaylistSerializer(playlist, data={'weekdays': data['weekdays']}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.save().weekdays_mask, 31)
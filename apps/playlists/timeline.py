@@ -0,0 +1,96 @@
+"""
+Calendrier de diffusion de tout le parc sur une période.
+
+Toutes les playlists actives et leurs assignations sont chargées en deux
+requêtes. Les intervalles d'activité de chaque playlist sont calculés une
+seule fois (schedule.active_intervals), puis chaque ensemble distinct de
+playlists est résolu par un balayage de ses bornes (schedule.sweep) : les écrans partageant
+les mêmes playlists partagent le même calendrier.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apps.screens.models import Screen
+from .models import Playlist
+from .schedule import SCHEDULE_FIELDS, active_intervals, sort_windows, sweep
+
+
+def _parse_moment(value):
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Date invalide : {value}")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class FleetTimeline:
+    """Calendriers compacts par écran : {screen_id: [(début, fin, playlist_id), ...]}"""
+
+    @classmethod
+    def parse_range(cls, start=None, end=None, hours=24):
+        """Période à partir de dates/heures ISO (locales si naïves) ; par défaut maintenant + hours"""
+        start = _parse_moment(start) or timezone.now()
+        end = _parse_moment(end) or start + timedelta(hours=hours)
+        if end <= start:
+            raise ValueError("La fin de la période doit suivre son début")
+        return cls(start, end)
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.playlists = {}
+        self.screens = {}
+        self.timelines = {}
+
+    def compute(self, screen_ids=None):
+        windows = sort_windows(Playlist.objects.filter(is_active=True).values('name', *SCHEDULE_FIELDS))
+        self.playlists = {window['id']: window for window in windows}
+        ranks = {window['id']: rank for rank, window in enumerate(windows)}
+        intervals = {}
+
+        assignments = Playlist.screens.through.objects.filter(playlist__is_active=True)
+        screens = Screen.objects.all()
+        if screen_ids is not None:
+            assignments = assignments.filter(screen_id__in=screen_ids)
+            screens = screens.filter(pk__in=screen_ids)
+
+        playlist_sets = defaultdict(set)
+        for screen_id, playlist_id in assignments.values_list('screen_id', 'playlist_id').iterator():
+            playlist_sets[screen_id].add(playlist_id)
+
+        by_set = {}
+        self.screens, self.timelines = {}, {}
+        for screen_id, name in screens.order_by('name').values_list('pk', 'name').iterator():
+            self.screens[screen_id] = name
+            key = frozenset(playlist_sets.get(screen_id, ()))
+            if key not in by_set:
+                for playlist_id in key - intervals.keys():
+                    intervals[playlist_id] = active_intervals(self.playlists[playlist_id], self.start, self.end)
+                by_set[key] = sweep([(ranks[pk], pk, intervals[pk]) for pk in key])
+            self.timelines[screen_id] = by_set[key]
+        return self.timelines
+
+    def as_dict(self):
+        """Forme sérialisable (JSON) des calendriers calculés"""
+        return {
+            'start': self.start.isoformat(),
+            'end': self.end.isoformat(),
+            'playlists': {str(pk): window['name'] for pk, window in self.playlists.items()},
+            'screens': {
+                str(screen_id): {
+                    'name': self.screens[screen_id],
+                    'segments': [[opening.isoformat(), closing.isoformat(), str(playlist_id)]
+                                 for opening, closing, playlist_id in segments],
+                }
+                for screen_id, segments in self.timelines.items()
+            },
+        }
@@ -9,8 +9,10 @@ from django.contrib import messages
 from django.db.models import Count
 from .models import Playlist, PlaylistItem
 from .serializers import PlaylistSerializer, PlaylistDetailSerializer, PlaylistItemSerializer
+from .schedule import ALL_WEEKDAYS, weekdays_to_mask
 from apps.content.models import Content
 from apps.screens.models import Screen
+from apps.core.stats import get_stats
 
 
 class PlaylistViewSet(viewsets.ModelViewSet):
@@ -20,6 +22,12 @@ class PlaylistViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['is_active']
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return self.get_serializer_class().prefetch(queryset)
+        return queryset
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return PlaylistDetailSerializer
@@ -89,6 +97,7 @@ class PlaylistViewSet(viewsets.ModelViewSet):
             except (PlaylistItem.DoesNotExist, KeyError):
                 continue
         
+        playlist = PlaylistSerializer.prefetch(Playlist.objects.filter(pk=playlist.pk)).get()
         serializer = self.get_serializer(playlist)
         return Response(serializer.data)
     
@@ -104,7 +113,7 @@ class PlaylistViewSet(viewsets.ModelViewSet):
             end_date=playlist.end_date,
             start_time=playlist.start_time,
             end_time=playlist.end_time,
-            weekdays=playlist.weekdays,
+            weekdays_mask=playlist.weekdays_mask,
             priority=playlist.priority
         )
         
@@ -135,22 +144,15 @@ def playlists_list(request):
         screens_count=Count('screens', distinct=True)
     )
 
-    # Statistiques
-    active_playlists_count = Playlist.objects.filter(is_active=True).count()
-    scheduled_playlists_count = Playlist.objects.exclude(
-        start_date__isnull=True
-    ).count()
-    total_contents_count = Content.objects.count()
-    assigned_screens_count = Screen.objects.exclude(
-        playlists__isnull=True
-    ).distinct().count()
+    # Statistiques (en cache, voir apps.core.stats)
+    stats = get_stats()
 
     context = {
         'playlists': playlists,
-        'active_playlists_count': active_playlists_count,
-        'scheduled_playlists_count': scheduled_playlists_count,
-        'total_contents_count': total_contents_count,
-        'assigned_screens_count': assigned_screens_count,
+        'active_playlists_count': stats['active_playlists'],
+        'scheduled_playlists_count': stats['scheduled_playlists'],
+        'total_contents_count': stats['total_content'],
+        'assigned_screens_count': stats['assigned_screens'],
     }
 
     return render(request, 'playlists/list.html', context)
@@ -173,7 +175,7 @@ def playlist_create(request):
 
         # Jours de la semaine
         days = request.POST.getlist('days[]')
-        weekdays = ','.join(days) if days else '0,1,2,3,4,5,6'
+        weekdays_mask = weekdays_to_mask(days) if days else ALL_WEEKDAYS
 
         # Créer la playlist
         playlist = Playlist.objects.create(
@@ -184,7 +186,7 @@ def playlist_create(request):
             end_date=schedule_end_date,
             start_time=schedule_start_time,
             end_time=schedule_end_time,
-            weekdays=weekdays
+            weekdays_mask=weekdays_mask
         )
 
         # Assigner les écrans sélectionnés
@@ -263,7 +265,7 @@ def playlist_edit(request, pk):
 
         # Jours de la semaine
         days = request.POST.getlist('days[]')
-        playlist.weekdays = ','.join(days) if days else '0,1,2,3,4,5,6'
+        playlist.weekdays_mask = weekdays_to_mask(days) if days else ALL_WEEKDAYS
 
         # Priorité
         priority = request.POST.get('priority', 0)
@@ -5,3 +5,6 @@ class ScreensConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.screens'
     verbose_name = 'Écrans'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,6 +1,43 @@
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework import authentication
 from rest_framework import exceptions
 from .models import Screen
+import hashlib
+
+
+class ScreenUser:
+    """Utilisateur factice associé aux requêtes authentifiées par un écran"""
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+    is_staff = False
+    is_superuser = False
+
+
+def _token_cache_key(token):
+    return f'screen-token:{hashlib.sha1(token.encode()).hexdigest()}'
+
+
+def get_screen_for_token(token):
+    """Écran associé au token, mis en cache (TTL SCREEN_AUTH_CACHE_TIMEOUT) ; None si inconnu"""
+    key = _token_cache_key(token)
+    screen = cache.get(key)
+    if screen is not None:
+        return screen
+
+    try:
+        screen = Screen.objects.get(api_token=token)
+    except Screen.DoesNotExist:
+        return None
+
+    cache.set(key, screen, getattr(settings, 'SCREEN_AUTH_CACHE_TIMEOUT', 60))
+    return screen
+
+
+def invalidate_screen_token(*tokens):
+    """Retire les tokens du cache (écran supprimé, modifié ou token régénéré)"""
+    cache.delete_many([_token_cache_key(token) for token in tokens if token])
 
 
 class ScreenTokenAuthentication(authentication.BaseAuthentication):
@@ -14,15 +51,10 @@ class ScreenTokenAuthentication(authentication.BaseAuthentication):
         if not token:
             return None
         
-        try:
-            screen = Screen.objects.get(api_token=token)
-        except Screen.DoesNotExist:
+        screen = get_screen_for_token(token)
+        if screen is None:
             raise exceptions.AuthenticationFailed('Token invalide')
         
-        # On retourne un tuple (user, auth) mais pour les écrans on peut retourner (screen, token)
-        # On crée un objet "user" factice pour que DRF soit content
-        class ScreenUser:
-            is_authenticated = True
-            is_active = True
-            
+        # On retourne un tuple (user, auth) : l'écran authentifié est disponible
+        # dans request.auth pour les vues des appareils
         return (ScreenUser(), screen)
@@ -0,0 +1,88 @@
+"""
+Écriture différée des heartbeats des écrans.
+
+Chaque worker accumule les heartbeats reçus (dernière valeur par écran,
+champs réellement modifiés uniquement) et les écrit périodiquement avec un
+seul bulk_update par combinaison de champs. Le délai d'écriture est borné
+par HEARTBEAT_FLUSH_INTERVAL, très inférieur aux 5 minutes utilisées par
+Screen.is_online() et le tableau de bord.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import Screen
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._oldest = None
+        self._thread = None
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'HEARTBEAT_FLUSH_INTERVAL', 30)
+
+    def record(self, screen, **values):
+        """Enregistre un heartbeat ; met aussi à jour l'instance en mémoire"""
+        with self._lock:
+            pending = self._pending.get(screen.pk, {})
+            for field, value in values.items():
+                # last_heartbeat change toujours ; les autres champs seulement si modifiés
+                if field == 'last_heartbeat' or field in pending or getattr(screen, field) != value:
+                    pending[field] = value
+                setattr(screen, field, value)
+
+            self._pending[screen.pk] = pending
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            overdue = time.monotonic() - self._oldest >= self.flush_interval
+
+        if overdue:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def flush(self):
+        """Écrit les heartbeats en attente ; retourne le nombre d'écrans mis à jour"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._oldest = None
+
+        if not pending:
+            return 0
+
+        groups = defaultdict(list)
+        for screen_id, changes in pending.items():
+            groups[tuple(sorted(changes))].append(Screen(pk=screen_id, **changes))
+
+        for fields, screens in groups.items():
+            Screen.objects.bulk_update(screens, fields, batch_size=500)
+        return len(pending)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='heartbeat-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(max(self.flush_interval, 1))
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Échec de l'écriture des heartbeats")
+
+
+heartbeat_buffer = HeartbeatBuffer()
+atexit.register(heartbeat_buffer.flush)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('screens', '0002_screen_description'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='screen',
+            index=models.Index(fields=['-last_heartbeat'], name='screen_heartbeat_idx'),
+        ),
+    ]
@@ -1,8 +1,41 @@
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
+import re
 import uuid
 
+RESOLUTION_RE = re.compile(r'^\s*(\d+)\s*[xX×*]\s*(\d+)\s*$')
+
+
+def parse_resolution(device_info):
+    """
+    Résolution (largeur, hauteur) annoncée dans device_info, ou None.
+    Formats acceptés : screen_width/screen_height, width/height,
+    resolution = "1920x1080", [1920, 1080] ou {"width": .., "height": ..}.
+    """
+    if not isinstance(device_info, dict):
+        return None
+
+    value = device_info.get('resolution')
+    if isinstance(value, str):
+        match = RESOLUTION_RE.match(value)
+        value = match.groups() if match else None
+    elif isinstance(value, dict):
+        value = (value.get('width'), value.get('height'))
+    if not value:
+        for width_key, height_key in (('screen_width', 'screen_height'), ('width', 'height')):
+            if width_key in device_info and height_key in device_info:
+                value = (device_info[width_key], device_info[height_key])
+                break
+
+    try:
+        width, height = (int(dimension) for dimension in value)
+    except (TypeError, ValueError):
+        return None
+    if width <= 0 or height <= 0:
+        return None
+    return width, height
+
 
 class Screen(models.Model):
     STATUS_CHOICES = [
@@ -29,6 +62,10 @@ class Screen(models.Model):
         ordering = ['-created_at']
         verbose_name = "Écran"
         verbose_name_plural = "Écrans"
+        indexes = [
+            # Tri du tableau de bord et de la liste, comptage des écrans en ligne
+            models.Index(fields=['-last_heartbeat'], name='screen_heartbeat_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.location}"
@@ -38,6 +75,17 @@ class Screen(models.Model):
             return False
         return timezone.now() - self.last_heartbeat < timedelta(minutes=5)
     
+    @property
+    def resolution(self):
+        """(largeur, hauteur) de l'affichage d'après device_info, ou None"""
+        return parse_resolution(self.device_info)
+    
+    def regenerate_token(self):
+        """Génère un nouveau token API (l'ancien est invalidé immédiatement)"""
+        self.api_token = str(uuid.uuid4())
+        self.save(update_fields=['api_token', 'updated_at'])
+        return self.api_token
+    
     def save(self, *args, **kwargs):
         if not self.api_token:
             self.api_token = str(uuid.uuid4())
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Screen, parse_resolution
+from .authentication import invalidate_screen_token
+from apps.content.renditions import rendition_queue
+
+
+@receiver(post_init, sender=Screen)
+def remember_api_token(sender, instance, **kwargs):
+    """Mémorise le token chargé pour détecter sa régénération"""
+    # __dict__ : ne pas déclencher de requête si le champ est différé
+    instance._loaded_api_token = instance.__dict__.get('api_token')
+    instance._loaded_resolution = parse_resolution(instance.__dict__.get('device_info'))
+
+
+@receiver(post_save, sender=Screen)
+@receiver(post_delete, sender=Screen)
+def invalidate_screen_auth_cache(sender, instance, **kwargs):
+    """Invalide le cache d'authentification (ancien et nouveau token)"""
+    token = instance.__dict__.get('api_token')
+    invalidate_screen_token(getattr(instance, '_loaded_api_token', None), token)
+    instance._loaded_api_token = token
+
+
+@receiver(post_save, sender=Screen)
+def queue_resolution_variants(sender, instance, **kwargs):
+    """Variantes des images pour une résolution qui vient d'apparaître"""
+    resolution = parse_resolution(instance.__dict__.get('device_info'))
+    if resolution and resolution != getattr(instance, '_loaded_resolution', None):
+        transaction.on_commit(lambda: rendition_queue.submit_resolution(resolution))
+    instance._loaded_resolution = resolution
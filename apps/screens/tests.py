@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.analytics.models import ScreenLog
+from .models import Screen
+from .views import accepts_gzip, polling_delay
+
+
+class LogsDownloadTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('admin', password='x'))
+        self.screen = Screen.objects.create(name="Accueil", location="Hall")
+        ScreenLog.objects.create(screen=self.screen, action='play')
+
+    def test_invalid_screen_parameter_is_rejected(self):
+        response = self.client.get('/screens/logs/download/', {'screen': 'pas-un-uuid'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_screen_parameter_filters_logs(self):
+        response = self.client.get('/screens/logs/download/', {'screen': str(self.screen.pk)})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Accueil", b''.join(response.streaming_content).decode())
+
+
+class AcceptsGzipTests(TestCase):
+    def accepts(self, header):
+        return accepts_gzip(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header))
+
+    def test_qvalues(self):
+        self.assertTrue(self.accepts('gzip, deflate'))
+        self.assertTrue(self.accepts('br;q=1.0, gzip;q=0.5'))
+        self.assertTrue(self.accepts('*'))
+        self.assertFalse(self.accepts(''))
+        self.assertFalse(self.accepts('gzip;q=0'))
+        self.assertFalse(self.accepts('gzip;q=0.000, *;q=1'))
+        self.assertFalse(self.accepts('identity, *;q=0'))
+        self.assertFalse(self.accepts('deflate'))
+
+
+class RegenerateTokenTests(TestCase):
+    def setUp(self):
+        self.screen = Screen.objects.create(name="Accueil", location="Hall")
+        self.other = Screen.objects.create(name="Caisse", location="Hall")
+        self.url = f'/api/screens/{self.other.pk}/regenerate_token/'
+
+    def test_screen_cannot_rotate_another_screen_token(self):
+        client = APIClient()
+        response = client.post(self.url, HTTP_X_SCREEN_TOKEN=self.screen.api_token)
+        self.assertEqual(response.status_code, 403)
+        token = self.other.api_token
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.api_token, token)
+
+    def test_non_staff_user_is_refused(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('operateur', password='x'))
+        self.assertEqual(client.post(self.url).status_code, 403)
+
+    def test_staff_user_rotates_token(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', password='x', is_staff=True))
+        response = client.post(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.other.refresh_from_db()
+        self.assertEqual(response.data['api_token'], self.other.api_token)
+
+
+class ScreenEventsTests(TestCase):
+    def test_wsgi_request_is_refused(self):
+        screen = Screen.objects.create(name="Accueil", location="Hall")
+        response = self.client.get('/api/screens/events/', HTTP_X_SCREEN_TOKEN=screen.api_token)
+        self.assertEqual(response.status_code, 501)
+
+    async def test_asgi_request_is_served(self):
+        response = await AsyncClient().get('/api/screens/events/')
+        self.assertEqual(response.status_code, 400)
+
+
+class PrefetchTests(TestCase):
+    def setUp(self):
+        self.screen = Screen.objects.create(name="Accueil", location="Hall")
+
+    def prefetch(self, hours):
+        return APIClient().get('/api/screens/prefetch/', {'hours': hours},
+                               HTTP_X_SCREEN_TOKEN=self.screen.api_token)
+
+    def test_invalid_hours_are_rejected(self):
+        for hours in ('abc', 'nan', 'inf', '-inf'):
+            with self.subTest(hours=hours):
+                self.assertEqual(self.prefetch(hours).status_code, 400)
+
+    def test_hours_are_clamped(self):
+        self.assertEqual(self.prefetch('1e6').status_code, 200)
+
+
+@override_settings(SCREEN_POLL_MIN_INTERVAL=30, SCREEN_POLL_MAX_INTERVAL=900,
+                   SCREEN_POLL_TRANSITION_LEAD=5, SCREEN_POLL_JITTER=0.1, SCREEN_POLL_TRANSITION_FLOOR=2)
+class PollingDelayTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def delay(self, seconds):
+        return polling_delay(self.now + timedelta(seconds=seconds), self.now)
+
+    def test_imminent_transition_is_not_missed(self):
+        self.assertEqual(self.delay(12), 12)
+        self.assertEqual(self.delay(29.5), 30)
+        self.assertEqual(self.delay(1), 2)
+        self.assertEqual(self.delay(-10), 2)
+
+    def test_distant_transition(self):
+        self.assertTrue(85 <= self.delay(100) <= 95)
+        self.assertTrue(810 <= polling_delay(None, self.now) <= 900)
@@ -1,20 +1,117 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
 from django.utils import timezone
-from django.db import models
+from django.utils.http import parse_etags, quote_etag
 from datetime import timedelta
-from .models import Screen
+from .models import Screen, parse_resolution
 from .serializers import ScreenSerializer, ScreenRegisterSerializer
+from .heartbeats import heartbeat_buffer
+from .authentication import get_screen_for_token
+from .renderers import DEVICE_MANIFEST_RENDERERS
 from apps.playlists.models import Playlist
 from apps.playlists.serializers import PlaylistSerializer
+from apps.playlists.manifest import (get_current_state, get_current_version, get_playlist_manifest,
+                                     get_device_manifest_body, get_prefetch_manifest, resolve_screen)
+from apps.playlists.notifier import manifest_notifier
 from apps.analytics.models import ScreenLog
+from apps.analytics.serializers import ScreenLogEventSerializer, ScreenLogSerializer
+from apps.analytics.pagination import ScreenLogCursorPagination, keyset_page
+from apps.analytics.counters import record_plays
+from apps.content.models import Content
+from apps.content.renditions import rendition_queue
+import math
+import random
 import uuid
 
 
+# Nombre maximal d'événements acceptés par log_events
+LOG_EVENTS_MAX_BATCH = 1000
+
+# Taille des lots lus par le curseur serveur lors des exports CSV
+LOGS_EXPORT_CHUNK_SIZE = 2000
+
+
+def authenticated_screen(request):
+    """Écran authentifié par ScreenTokenAuthentication, ou None"""
+    return request.auth if isinstance(request.auth, Screen) else None
+
+
+def accepts_gzip(request):
+    """
+    Accept-Encoding autorise gzip : qvalue de gzip (ou à défaut de *) non nulle.
+    "gzip;q=0" ou "*;q=0" sans gzip explicite refusent la compression.
+    """
+    qvalues = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[coding] = qvalue
+    
+    if 'gzip' in qvalues:
+        return qvalues['gzip'] > 0
+    return qvalues.get('*', 0) > 0
+
+
+def polling_delay(next_transition, now):
+    """
+    Délai conseillé (secondes) avant le prochain appel de l'écran : juste avant
+    la prochaine bascule de planification, borné, avec une gigue qui avance
+    le réveil (jamais ne le retarde) pour étaler les appels du parc. Une
+    bascule plus proche que le délai minimal donne le temps restant jusqu'à
+    elle : l'écran ne la manque pas de min_delay secondes.
+    """
+    min_delay = getattr(settings, 'SCREEN_POLL_MIN_INTERVAL', 30)
+    max_delay = getattr(settings, 'SCREEN_POLL_MAX_INTERVAL', 900)
+    lead = getattr(settings, 'SCREEN_POLL_TRANSITION_LEAD', 5)
+    jitter = getattr(settings, 'SCREEN_POLL_JITTER', 0.1)
+    floor = getattr(settings, 'SCREEN_POLL_TRANSITION_FLOOR', 2)
+    
+    if next_transition is not None:
+        remaining = (next_transition - now).total_seconds()
+        if remaining < min_delay:
+            return max(floor, math.ceil(remaining))
+    
+    delay = max_delay
+    if next_transition is not None:
+        delay = min(delay, (next_transition - now).total_seconds() - lead)
+    delay -= random.uniform(0, delay * jitter) if delay > 0 else 0
+    return int(max(min_delay, delay))
+
+
+def with_schedule_hint(response, next_transition, now, retry_after=None):
+    """Ajoute la prochaine bascule et Retry-After à une réponse destinée à un écran"""
+    if retry_after is None:
+        retry_after = polling_delay(next_transition, now)
+    response['Retry-After'] = str(retry_after)
+    if next_transition is not None:
+        response['X-Next-Transition'] = next_transition.isoformat()
+    return response
+
+
+def etag_matches(etag, if_none_match):
+    """Comparaison faible de l'en-tête If-None-Match (RFC 9110)"""
+    etags = parse_etags(if_none_match)
+    if '*' in etags:
+        return True
+    strip = lambda value: value[2:] if value.startswith('W/') else value
+    return strip(etag) in [strip(value) for value in etags]
+
+
 class ScreenViewSet(viewsets.ModelViewSet):
     queryset = Screen.objects.all()
     serializer_class = ScreenSerializer
@@ -23,6 +120,9 @@ class ScreenViewSet(viewsets.ModelViewSet):
         # Autoriser l'enregistrement sans authentification
         if self.action == 'register':
             return [AllowAny()]
+        if self.action == 'regenerate_token':
+            # Réservé aux administrateurs : un écran (ScreenUser) ne peut pas révoquer le token d'un autre
+            return [IsAdminUser()]
         return [IsAuthenticated()]
     
     @action(detail=False, methods=['post'], permission_classes=[AllowAny])
@@ -54,98 +154,231 @@ class ScreenViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def heartbeat(self, request):
         """Signale que l'écran est actif"""
-        token = request.META.get('HTTP_X_SCREEN_TOKEN')
-        if not token:
+        screen = authenticated_screen(request)
+        if screen is None:
             return Response({'error': 'Token manquant'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            screen = Screen.objects.get(api_token=token)
-            screen.last_heartbeat = timezone.now()
-            screen.status = 'active'
-            
-            # Mettre à jour les infos si fournies
-            if 'app_version' in request.data:
-                screen.app_version = request.data['app_version']
-            if 'device_info' in request.data:
-                screen.device_info = request.data['device_info']
-            
-            screen.save(update_fields=['last_heartbeat', 'status', 'app_version', 'device_info'])
+        values = {'last_heartbeat': timezone.now(), 'status': 'active'}
+        
+        # Mettre à jour les infos si fournies
+        if 'app_version' in request.data:
+            values['app_version'] = request.data['app_version']
+        if 'device_info' in request.data:
+            values['device_info'] = request.data['device_info']
             
-            return Response({
-                'status': 'ok',
-                'screen_id': str(screen.id),
-                'name': screen.name
-            })
-        except Screen.DoesNotExist:
-            return Response({'error': 'Écran non trouvé'}, 
-                          status=status.HTTP_404_NOT_FOUND)
+            # Nouvelle résolution : variantes des images à produire (écriture
+            # différée ci-dessous, sans signal post_save). Planifiée une seule
+            # fois par résolution et hors requête (voir submit_resolution)
+            resolution = parse_resolution(values['device_info'])
+            if resolution and resolution != screen.resolution:
+                rendition_queue.submit_resolution(resolution)
+        
+        # Écriture différée et groupée (voir heartbeats.py)
+        heartbeat_buffer.record(screen, **values)
+        
+        # Indication de rappel : le lecteur peut dormir jusqu'à la prochaine bascule
+        now = values['last_heartbeat']
+        _, next_transition, _ = resolve_screen(screen, now)
+        retry_after = polling_delay(next_transition, now)
+        response = Response({
+            'status': 'ok',
+            'screen_id': str(screen.id),
+            'name': screen.name,
+            'next_transition': next_transition.isoformat() if next_transition else None,
+            'retry_after': retry_after,
+        })
+        return with_schedule_hint(response, next_transition, now, retry_after)
     
     @action(detail=False, methods=['get'])
     def current_playlist(self, request):
         """Retourne la playlist active pour cet écran"""
-        token = request.META.get('HTTP_X_SCREEN_TOKEN')
-        if not token:
+        screen = authenticated_screen(request)
+        if screen is None:
             return Response({'error': 'Token manquant'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            screen = Screen.objects.get(api_token=token)
-            
-            # Trouve la playlist active pour cet écran
-            now = timezone.now()
-            current_date = now.date()
-            current_time = now.time()
-            current_weekday = str(now.weekday())
-            
-            playlist = Playlist.objects.filter(
-                screens=screen,
-                is_active=True
-            ).filter(
-                models.Q(start_date__isnull=True) | models.Q(start_date__lte=current_date)
-            ).filter(
-                models.Q(end_date__isnull=True) | models.Q(end_date__gte=current_date)
-            ).filter(
-                models.Q(start_time__isnull=True) | models.Q(start_time__lte=current_time)
-            ).filter(
-                models.Q(end_time__isnull=True) | models.Q(end_time__gte=current_time)
-            ).filter(
-                weekdays__contains=current_weekday
-            ).order_by('-priority').first()
-            
-            if playlist:
-                serializer = PlaylistSerializer(playlist, context={'request': request})
-                return Response(serializer.data)
+        # Résolution de la planification via le cache partagé des manifestes
+        now = timezone.now()
+        current, next_transition = get_current_state(screen, now)
+        
+        if current is not None:
+            playlist_id, version = current
+            etag = quote_etag(version)
             
-            return Response({'message': 'Aucune playlist active'}, 
-                          status=status.HTTP_204_NO_CONTENT)
+            # Requête conditionnelle : rien n'a changé depuis le dernier appel
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            if if_none_match and etag_matches(etag, if_none_match):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return with_schedule_hint(response, next_transition, now)
             
-        except Screen.DoesNotExist:
-            return Response({'error': 'Écran non trouvé'}, 
-                          status=status.HTTP_404_NOT_FOUND)
+            manifest = get_playlist_manifest(playlist_id, version, request)
+            if manifest is not None:
+                response = Response(manifest)
+                response['ETag'] = etag
+                return with_schedule_hint(response, next_transition, now)
+        
+        response = Response({'message': 'Aucune playlist active'}, 
+                            status=status.HTTP_204_NO_CONTENT)
+        return with_schedule_hint(response, next_transition, now)
+    
+    @action(detail=False, methods=['get'], renderer_classes=DEVICE_MANIFEST_RENDERERS)
+    def manifest(self, request):
+        """Manifeste compact pour les lecteurs (JSON ou MessagePack selon Accept, gzip si accepté,
+        delta depuis la version `since` si elle est encore connue)"""
+        from django.http import HttpResponse
+        from django.utils.cache import patch_vary_headers
+        
+        screen = authenticated_screen(request)
+        if screen is None:
+            return Response({'error': 'Token manquant'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        now = timezone.now()
+        current, next_transition = get_current_state(screen, now)
+        if current is None:
+            return with_schedule_hint(Response(status=status.HTTP_204_NO_CONTENT), next_transition, now)
+        
+        playlist_id, version = current
+        renderer = request.accepted_renderer
+        gzipped = accepts_gzip(request)
+        
+        # Version détenue par le lecteur : seul le delta depuis celle-ci est envoyé
+        since = request.query_params.get('since')
+        
+        # Un ETag distinct par représentation (format, encodage, variantes d'images)
+        resolution = screen.resolution
+        variant = f'.{resolution[0]}x{resolution[1]}' if resolution else ''
+        etag = quote_etag(f'{version}{variant}.{renderer.format}{".gz" if gzipped else ""}')
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if since == version or (if_none_match and etag_matches(etag, if_none_match)):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            body = get_device_manifest_body(playlist_id, version, request, renderer, gzipped, since,
+                                            resolution=resolution)
+            response = HttpResponse(body, content_type=renderer.media_type)
+            if gzipped:
+                response['Content-Encoding'] = 'gzip'
+        
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return with_schedule_hint(response, next_transition, now)
+    
+    @action(detail=False, methods=['get'], renderer_classes=DEVICE_MANIFEST_RENDERERS)
+    def prefetch(self, request):
+        """Contenus nécessaires sur les `hours` prochaines heures, par ordre de premier besoin"""
+        screen = authenticated_screen(request)
+        if screen is None:
+            return Response({'error': 'Token manquant'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        default_hours = getattr(settings, 'PREFETCH_HORIZON_HOURS', 24)
+        max_hours = getattr(settings, 'PREFETCH_MAX_HOURS', 168)
+        try:
+            hours = float(request.query_params.get('hours', default_hours))
+        except ValueError:
+            hours = math.nan
+        # float() accepte aussi 'nan' et 'inf'
+        if not math.isfinite(hours):
+            return Response({'error': 'Paramètre hours invalide'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        hours = min(max(hours, 0), max_hours)
+        
+        now = timezone.now()
+        return Response(get_prefetch_manifest(screen, now, now + timedelta(hours=hours), request))
     
     @action(detail=False, methods=['post'])
     def log_event(self, request):
         """Log des événements depuis l'écran"""
-        token = request.META.get('HTTP_X_SCREEN_TOKEN')
-        if not token:
+        screen = authenticated_screen(request)
+        if screen is None:
             return Response({'error': 'Token manquant'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            screen = Screen.objects.get(api_token=token)
-            
-            ScreenLog.objects.create(
+        log = ScreenLog.objects.create(
+            screen=screen,
+            content_id=request.data.get('content_id'),
+            action=request.data.get('action', 'unknown'),
+            details=request.data.get('details', {})
+        )
+        record_plays([log])
+        
+        return Response({'status': 'logged'})
+    
+    @action(detail=False, methods=['post'])
+    def log_events(self, request):
+        """Log groupé d'événements (file d'attente locale de l'écran)"""
+        screen = authenticated_screen(request)
+        if screen is None:
+            return Response({'error': 'Token manquant'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        events = request.data.get('events') if isinstance(request.data, dict) else request.data
+        if not isinstance(events, list):
+            return Response({'error': 'Liste d\'événements attendue'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        if len(events) > LOG_EVENTS_MAX_BATCH:
+            return Response({'error': f'Maximum {LOG_EVENTS_MAX_BATCH} événements par requête'},
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        # Validation de tous les événements en une passe
+        validated = {}
+        results = []
+        for index, event in enumerate(events):
+            serializer = ScreenLogEventSerializer(data=event)
+            if serializer.is_valid():
+                validated[index] = serializer.validated_data
+                results.append({'index': index, 'status': 'accepted'})
+            else:
+                results.append({'index': index, 'status': 'rejected', 'errors': serializer.errors})
+        
+        # Une seule requête pour vérifier l'existence des contenus référencés
+        content_ids = {data['content_id'] for data in validated.values() if data.get('content_id')}
+        known_content_ids = set(Content.objects.filter(
+            id__in=content_ids
+        ).values_list('id', flat=True)) if content_ids else set()
+        
+        logs = []
+        now = timezone.now()
+        for index, data in validated.items():
+            content_id = data.get('content_id')
+            if content_id and content_id not in known_content_ids:
+                results[index] = {'index': index, 'status': 'rejected',
+                                  'errors': {'content_id': ['Contenu non trouvé']}}
+                continue
+            logs.append(ScreenLog(
                 screen=screen,
-                content_id=request.data.get('content_id'),
-                action=request.data.get('action', 'unknown'),
-                details=request.data.get('details', {})
-            )
-            
-            return Response({'status': 'logged'})
-        except Screen.DoesNotExist:
-            return Response({'error': 'Écran non trouvé'}, 
-                          status=status.HTTP_404_NOT_FOUND)
+                content_id=content_id,
+                action=data['action'],
+                details=data.get('details', {}),
+                timestamp=data.get('timestamp', now)
+            ))
+        
+        ScreenLog.objects.bulk_create(logs, batch_size=500)
+        record_plays(logs)
+        
+        return Response({
+            'accepted': len(logs),
+            'rejected': len(events) - len(logs),
+            'results': results
+        })
+    
+    @action(detail=True, methods=['get'])
+    def logs(self, request, pk=None):
+        """Logs d'un écran, paginés par curseur (filtres : action, start, end)"""
+        screen = self.get_object()
+        logs = _filter_logs(ScreenLog.objects.filter(screen=screen), request.query_params)
+        
+        paginator = ScreenLogCursorPagination()
+        page = paginator.paginate_queryset(logs, request, view=self)
+        return paginator.get_paginated_response(ScreenLogSerializer(page, many=True).data)
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
+    def regenerate_token(self, request, pk=None):
+        """Régénère le token API d'un écran (l'ancien token est révoqué)"""
+        screen = self.get_object()
+        return Response({'screen_id': str(screen.id), 'api_token': screen.regenerate_token()})
     
     @action(detail=True, methods=['get'])
     def status_detail(self, request, pk=None):
@@ -156,7 +389,9 @@ class ScreenViewSet(viewsets.ModelViewSet):
         return Response({
             'screen': ScreenSerializer(screen).data,
             'is_online': screen.is_online(),
-            'playlists': PlaylistSerializer(screen.playlists.filter(is_active=True), many=True).data,
+            'playlists': PlaylistSerializer(
+                PlaylistSerializer.prefetch(screen.playlists.filter(is_active=True)), many=True
+            ).data,
             'recent_logs': [
                 {
                     'action': log.action,
@@ -167,6 +402,81 @@ class ScreenViewSet(viewsets.ModelViewSet):
         })
 
 
+# =============================================================================
+# FLUX TEMPS RÉEL (SERVER-SENT EVENTS, À SERVIR EN ASGI)
+# =============================================================================
+
+NO_PLAYLIST_VERSION = 'none'
+
+
+async def screen_events(request):
+    """Flux SSE : notifie l'écran uniquement quand son manifeste résolu change"""
+    from asgiref.sync import sync_to_async
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import JsonResponse, StreamingHttpResponse
+
+    # Sous WSGI, StreamingHttpResponse consomme le générateur asynchrone en
+    # entier avant d'envoyer quoi que ce soit : le flux ne partirait jamais
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Flux SSE disponible uniquement via le serveur ASGI (config.asgi)'},
+            status=501
+        )
+
+    token = request.META.get('HTTP_X_SCREEN_TOKEN')
+    if not token:
+        return JsonResponse({'error': 'Token manquant'}, status=400)
+
+    screen = await sync_to_async(get_screen_for_token)(token)
+    if screen is None:
+        return JsonResponse({'error': 'Token invalide'}, status=401)
+
+    # Version déjà connue du lecteur (reconnexion automatique d'EventSource)
+    last_version = request.META.get('HTTP_LAST_EVENT_ID')
+
+    response = StreamingHttpResponse(
+        _manifest_events(screen, last_version),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Désactive le buffering nginx
+    return response
+
+
+async def _manifest_events(screen, last_version):
+    from asgiref.sync import sync_to_async
+    import asyncio
+    import json
+
+    keepalive = getattr(settings, 'SCREEN_EVENTS_KEEPALIVE', 25)
+    max_duration = getattr(settings, 'SCREEN_EVENTS_MAX_DURATION', 600)
+    resolve_version = sync_to_async(get_current_version, thread_sensitive=False)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_duration
+
+    # Délai de reconnexion du lecteur (millisecondes)
+    yield 'retry: 5000\n\n'
+
+    # La connexion est fermée périodiquement : le lecteur se reconnecte avec
+    # Last-Event-ID, ce qui libère les connexions abandonnées côté serveur
+    while loop.time() < deadline:
+        # Réévalué à chaque réveil : couvre aussi les changements d'horaire
+        current = await resolve_version(screen, timezone.now())
+        playlist_id, version = current if current else (None, NO_PLAYLIST_VERSION)
+
+        if version != last_version:
+            last_version = version
+            data = json.dumps({
+                'playlist_id': str(playlist_id) if playlist_id else None,
+                'version': version,
+            })
+            yield f'id: {version}\nevent: manifest\ndata: {data}\n\n'
+
+        if not await manifest_notifier.wait(keepalive):
+            yield ': keepalive\n\n'
+
+
 # =============================================================================
 # VUES WEB POUR LES TEMPLATES HTML
 # =============================================================================
@@ -203,40 +513,15 @@ def screen_detail(request, pk):
     # Récupérer les logs récents
     screen_logs = ScreenLog.objects.filter(screen=screen).order_by('-timestamp')[:20]
 
-    # Playlist actuelle
-    current_playlist = None
-    try:
-        # D'abord, chercher toutes les playlists assignées à cet écran
-        assigned_playlists = screen.playlists.filter(is_active=True)
-
-        if assigned_playlists.exists():
-            # Si on a des playlists, appliquer les filtres de planification
-            now = timezone.now()
-            current_date = now.date()
-            current_time = now.time()
-            current_weekday = str(now.weekday())
-
-            # Chercher une playlist qui correspond aux critères de planification
-            current_playlist = assigned_playlists.filter(
-                models.Q(start_date__isnull=True) | models.Q(start_date__lte=current_date)
-            ).filter(
-                models.Q(end_date__isnull=True) | models.Q(end_date__gte=current_date)
-            ).filter(
-                models.Q(start_time__isnull=True) | models.Q(start_time__lte=current_time)
-            ).filter(
-                models.Q(end_time__isnull=True) | models.Q(end_time__gte=current_time)
-            ).filter(
-                models.Q(weekdays__isnull=True) | models.Q(weekdays__contains=current_weekday)
-            ).order_by('-priority').first()
-
-            # Si aucune playlist ne correspond aux critères de planification,
-            # prendre la première playlist active assignée (fallback)
-            if not current_playlist:
-                current_playlist = assigned_playlists.order_by('-priority').first()
-    except Exception as e:
-        print(f"Erreur lors de la récupération de la playlist: {e}")
+    # Playlist actuelle : index des bascules partagé avec les écrans (voir manifest.py)
+    window, next_transition, index = resolve_screen(screen, timezone.now())
+    if window is None and index is not None and index.ranking:
+        # Aucune playlist planifiée maintenant : la plus prioritaire des playlists assignées
+        window = index.windows[index.ranking[0]]
+    current_playlist = Playlist.objects.filter(pk=window['id']).first() if window else None
 
     screen.current_playlist = current_playlist
+    screen.next_transition = next_transition
 
     context = {
         'screen': screen,
@@ -365,43 +650,130 @@ def screen_logs(request, pk):
     """Afficher tous les logs d'un écran"""
     screen = get_object_or_404(Screen, pk=pk)
 
-    # Récupérer tous les logs de cet écran
-    logs = ScreenLog.objects.filter(screen=screen).order_by('-timestamp')
+    # Pagination par curseur sur (timestamp, id) : pas de COUNT ni d'OFFSET
+    logs = _filter_logs(ScreenLog.objects.filter(screen=screen), request.GET)
+    page = keyset_page(
+        logs.select_related('content'),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+    # Filtres à conserver dans les liens de pagination
+    filters = request.GET.copy()
+    filters.pop('after', None)
+    filters.pop('before', None)
 
     context = {
         'screen': screen,
-        'logs': logs,
+        'logs': page['items'],
+        'next_cursor': page['next_cursor'],
+        'previous_cursor': page['previous_cursor'],
+        'filters': filters,
         'screens_count': Screen.objects.count(),
     }
 
     return render(request, 'screens/logs.html', context)
 
 
+def _filter_logs(logs, params):
+    """Filtres communs des logs : action, date de début et date de fin (AAAA-MM-JJ)"""
+    from django.utils.dateparse import parse_date
+    from datetime import datetime, time
+
+    action = params.get('action')
+    if action:
+        logs = logs.filter(action=action)
+
+    try:
+        start = parse_date(params.get('start') or '')
+        end = parse_date(params.get('end') or '')
+    except ValueError:
+        start = end = None
+
+    # Bornes en datetime pour conserver l'usage de l'index sur timestamp
+    if start:
+        logs = logs.filter(timestamp__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end:
+        logs = logs.filter(timestamp__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)))
+
+    return logs
+
+
+def _stream_logs_csv(request, logs, filename, with_screen=False):
+    """Export CSV en streaming (curseur serveur), compressé en gzip si accepté"""
+    from django.http import StreamingHttpResponse
+    from django.utils.cache import patch_vary_headers
+    from django.utils.text import compress_sequence
+    import csv
+    import io
+
+    header = ['Date/Heure', 'Action', 'Détails']
+    fields = ['timestamp', 'action', 'details']
+    if with_screen:
+        header.insert(0, 'Écran')
+        fields.insert(0, 'screen__name')
+
+    timestamp_index = fields.index('timestamp')
+
+    def rows():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+
+        for row in logs.values_list(*fields).iterator(chunk_size=LOGS_EXPORT_CHUNK_SIZE):
+            row = list(row)
+            row[timestamp_index] = row[timestamp_index].strftime('%Y-%m-%d %H:%M:%S')
+            row[-1] = str(row[-1])
+            writer.writerow(row)
+
+            # Envoi par blocs de ~64 Ko plutôt que ligne par ligne
+            if buffer.tell() >= 65536:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue().encode('utf-8')
+
+    content = rows()
+    gzipped = accepts_gzip(request)
+    if gzipped:
+        content = compress_sequence(content)
+
+    response = StreamingHttpResponse(content, content_type='text/csv; charset=utf-8')
+    if gzipped:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @login_required
 def screen_download_logs(request, pk):
     """Télécharger les logs d'un écran en CSV"""
-    from django.http import HttpResponse
-    import csv
-
     screen = get_object_or_404(Screen, pk=pk)
-    logs = ScreenLog.objects.filter(screen=screen).order_by('-timestamp')
+    logs = _filter_logs(ScreenLog.objects.filter(screen=screen), request.GET).order_by('-timestamp')
 
-    # Créer la réponse HTTP avec le type CSV
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="logs_{screen.name}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+    filename = f'logs_{screen.name}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    return _stream_logs_csv(request, logs, filename)
 
-    # Créer le writer CSV
-    writer = csv.writer(response)
-    writer.writerow(['Date/Heure', 'Action', 'Détails'])
 
-    for log in logs:
-        writer.writerow([
-            log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            log.action,
-            str(log.details)
-        ])
+@login_required
+def logs_download(request):
+    """Télécharger les logs de tous les écrans en CSV (audit de la flotte)"""
+    from django.http import HttpResponseBadRequest
 
-    return response
+    logs = _filter_logs(ScreenLog.objects.all(), request.GET).order_by('-timestamp')
+
+    screen_id = request.GET.get('screen')
+    if screen_id:
+        try:
+            screen_id = uuid.UUID(screen_id)
+        except ValueError:
+            return HttpResponseBadRequest("Paramètre screen invalide")
+        logs = logs.filter(screen_id=screen_id)
+
+    filename = f'logs_ecrans_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    return _stream_logs_csv(request, logs, filename, with_screen=True)
 
 
 @login_required
@@ -107,8 +107,11 @@ def check_setup():
             models.Q(start_time__isnull=True) | models.Q(start_time__lte=current_time)
         ).filter(
             models.Q(end_time__isnull=True) | models.Q(end_time__gte=current_time)
+        ).alias(
+            # Bit du jour courant dans le masque des jours (lundi = bit 0)
+            current_day=models.F('weekdays_mask').bitand(1 << now.weekday())
         ).filter(
-            weekdays__contains=current_weekday
+            current_day__gt=0
         )
 
         if active_playlists.exists():
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -124,6 +124,30 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Checksum calculé pendant l'upload : 'md5' (compatibilité), 'sha256' ou 'blake2b'
+CONTENT_CHECKSUM_ALGORITHM = config('CONTENT_CHECKSUM_ALGORITHM', default='md5')
+FILE_UPLOAD_HANDLERS = [
+    'apps.content.uploadhandlers.HashingMemoryFileUploadHandler',
+    'apps.content.uploadhandlers.HashingTemporaryFileUploadHandler',
+]
+
+# Préfixe de la location nginx "internal" servant MEDIA_ROOT (X-Accel-Redirect).
+# Vide : les téléchargements /api/content/<id>/download/ sont servis par Django.
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='')
+
+# Processus du pool de génération des aperçus (vignettes, images d'affiche)
+RENDITION_WORKERS = config('RENDITION_WORKERS', default=2, cast=int)
+
+# Upload par morceaux (/api/uploads/) : taille maximale d'un morceau, à garder
+# sous client_max_body_size de nginx, et durée de vie d'une session inactive
+UPLOAD_CHUNK_MAX_SIZE = config('UPLOAD_CHUNK_MAX_SIZE', default=50 * 1024 * 1024, cast=int)
+UPLOAD_SESSION_TTL = config('UPLOAD_SESSION_TTL', default=24 * 60 * 60, cast=int)
+
+# Délai avant suppression d'un blob orphelin réutilisé récemment (déduplication
+# d'un upload pas encore commité) ; les blobs restés orphelins sont supprimés
+# par la commande purge_blobs
+BLOB_RELEASE_GRACE = config('BLOB_RELEASE_GRACE', default=600, cast=int)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Login/Logout configuration
@@ -131,6 +155,78 @@ LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/login/'
 
+# Cache partagé entre les workers gunicorn (manifestes des écrans)
+REDIS_URL = config('REDIS_URL', default='')
+if IS_HEROKU and not REDIS_URL:
+    # Les dynos ne partagent pas de disque : un cache fichier par dyno laisserait
+    # des manifestes périmés après une invalidation faite sur un autre dyno
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured("REDIS_URL est requis sur Heroku (heroku addons:create heroku-redis)")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    # Cache fichier : partagé par tous les workers d'une seule machine uniquement.
+    # Chaque écriture liste le répertoire du cache (éviction) et les incréments
+    # ne sont pas atomiques : acceptable pour un petit parc, Redis au-delà.
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default=str(BASE_DIR / 'cache')),
+            'OPTIONS': {
+                'MAX_ENTRIES': 50000,
+            },
+        }
+    }
+
+# Durée de vie (secondes) des manifestes en cache, invalidés par signaux
+MANIFEST_CACHE_TIMEOUT = config('MANIFEST_CACHE_TIMEOUT', default=300, cast=int)
+
+# Délai maximal (secondes) avant publication des compteurs hit/miss d'un worker
+MANIFEST_STATS_FLUSH_INTERVAL = config('MANIFEST_STATS_FLUSH_INTERVAL', default=60, cast=int)
+
+# Historique des instantanés de manifestes par playlist (synchronisation par delta)
+MANIFEST_SNAPSHOT_HISTORY = config('MANIFEST_SNAPSHOT_HISTORY', default=10, cast=int)
+MANIFEST_SNAPSHOT_TIMEOUT = config('MANIFEST_SNAPSHOT_TIMEOUT', default=7 * 24 * 3600, cast=int)
+
+# Horizon (heures) du manifeste de préchargement /api/screens/prefetch/
+PREFETCH_HORIZON_HOURS = config('PREFETCH_HORIZON_HOURS', default=24, cast=int)
+PREFETCH_MAX_HOURS = config('PREFETCH_MAX_HOURS', default=168, cast=int)
+
+# Durée de vie (secondes) du cache token -> écran de l'authentification
+SCREEN_AUTH_CACHE_TIMEOUT = config('SCREEN_AUTH_CACHE_TIMEOUT', default=60, cast=int)
+
+# Rappel conseillé aux écrans (Retry-After) : juste avant la prochaine bascule
+# de planification, entre MIN et MAX secondes, avancé d'une gigue de 0 à 10 % ;
+# une bascule à moins de MIN secondes donne le temps restant (au moins FLOOR)
+SCREEN_POLL_MIN_INTERVAL = config('SCREEN_POLL_MIN_INTERVAL', default=30, cast=int)
+SCREEN_POLL_MAX_INTERVAL = config('SCREEN_POLL_MAX_INTERVAL', default=900, cast=int)
+SCREEN_POLL_TRANSITION_LEAD = config('SCREEN_POLL_TRANSITION_LEAD', default=5, cast=int)
+SCREEN_POLL_JITTER = config('SCREEN_POLL_JITTER', default=0.1, cast=float)
+SCREEN_POLL_TRANSITION_FLOOR = config('SCREEN_POLL_TRANSITION_FLOOR', default=2, cast=int)
+
+# Délai maximal (secondes) avant écriture des heartbeats en base
+HEARTBEAT_FLUSH_INTERVAL = config('HEARTBEAT_FLUSH_INTERVAL', default=30, cast=int)
+
+# Flux SSE des écrans (/api/screens/events/, servi par config.asgi)
+SCREEN_EVENTS_KEEPALIVE = config('SCREEN_EVENTS_KEEPALIVE', default=25, cast=int)
+SCREEN_EVENTS_MAX_DURATION = config('SCREEN_EVENTS_MAX_DURATION', default=600, cast=int)
+MANIFEST_NOTIFIER_POLL_INTERVAL = config('MANIFEST_NOTIFIER_POLL_INTERVAL', default=1.0, cast=float)
+
+# Durée de vie (secondes) des compteurs du tableau de bord, invalidés par signaux
+DASHBOARD_STATS_CACHE_TIMEOUT = config('DASHBOARD_STATS_CACHE_TIMEOUT', default=30, cast=int)
+
+# Actions de ScreenLog comptées comme diffusions (preuve de diffusion)
+PROOF_OF_PLAY_ACTIONS = config('PROOF_OF_PLAY_ACTIONS', default='play,content_played', cast=Csv(post_process=tuple))
+
+# Âge minimal (secondes) du plus grand id de log observé avant de l'agréger
+# (rollup_plays) : couvre les transactions encore ouvertes lors de l'observation
+ROLLUP_SAFETY_LAG = config('ROLLUP_SAFETY_LAG', default=60, cast=int)
+
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -7,7 +7,7 @@ from rest_framework.routers import DefaultRouter
 
 # API ViewSets
 from apps.screens.views import ScreenViewSet
-from apps.content.views import ContentViewSet
+from apps.content.views import ContentViewSet, UploadSessionViewSet
 from apps.playlists.views import PlaylistViewSet
 
 # Web Views
@@ -20,6 +20,7 @@ from apps.playlists import views as playlists_views
 router = DefaultRouter()
 router.register(r'screens', ScreenViewSet, basename='screen')
 router.register(r'content', ContentViewSet, basename='content')
+router.register(r'uploads', UploadSessionViewSet, basename='upload')
 router.register(r'playlists', PlaylistViewSet, basename='playlist')
 
 urlpatterns = [
@@ -31,6 +32,8 @@ urlpatterns = [
     # =========================================================================
     # API REST (pour l'application mobile)
     # =========================================================================
+    # Flux SSE des écrans (avant le router, sinon capturé comme détail d'écran)
+    path('api/screens/events/', screens_views.screen_events, name='screen_events'),
     path('api/', include(router.urls)),
     path('api-auth/', include('rest_framework.urls')),
 
@@ -45,12 +48,14 @@ urlpatterns = [
     # =========================================================================
     path('', core_views.dashboard, name='dashboard'),
     path('analytics/', core_views.analytics, name='analytics'),
+    path('analytics/data/', core_views.analytics_data, name='analytics_data'),
 
     # =========================================================================
     # INTERFACE WEB - ÉCRANS
     # =========================================================================
     path('screens/', screens_views.screens_list, name='screens_list'),
     path('screens/create/', screens_views.screen_create, name='screen_create'),
+    path('screens/logs/download/', screens_views.logs_download, name='logs_download'),
     path('screens/<uuid:pk>/', screens_views.screen_detail, name='screen_detail'),
     path('screens/<uuid:pk>/edit/', screens_views.screen_edit, name='screen_edit'),
     path('screens/<uuid:pk>/assign-playlist/', screens_views.screen_assign_playlist, name='screen_assign_playlist'),
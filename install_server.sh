@@ -168,8 +168,33 @@ ExecStart=$PROJECT_DIR/venv/bin/gunicorn \\
 WantedBy=multi-user.target
 EOF
 
+# Service ASGI du flux SSE des écrans (/api/screens/events/, vue asynchrone)
+cat > /etc/systemd/system/gunicorn-events.service <<EOF
+[Unit]
+Description=gunicorn (ASGI) daemon for screen events
+After=network.target
+
+[Service]
+User=$SYSTEM_USER
+Group=www-data
+WorkingDirectory=$PROJECT_DIR
+Environment="PATH=$PROJECT_DIR/venv/bin"
+ExecStart=$PROJECT_DIR/venv/bin/gunicorn \\
+          --access-logfile - \\
+          --workers 2 \\
+          --worker-class uvicorn.workers.UvicornWorker \\
+          --timeout 660 \\
+          --bind 127.0.0.1:8001 \\
+          config.asgi:application
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
 systemctl daemon-reload
 systemctl enable gunicorn.socket
+systemctl enable gunicorn-events.service
 
 echo "✅ Gunicorn configuré"
 
@@ -198,6 +223,17 @@ server {
         add_header Cache-Control "public";
     }
 
+    location /api/screens/events/ {
+        proxy_set_header Host \$http_host;
+        proxy_set_header X-Forwarded-For \$proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto \$scheme;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_buffering off;
+        proxy_read_timeout 700s;
+        proxy_pass http://127.0.0.1:8001;
+    }
+
     location / {
         proxy_set_header Host \$http_host;
         proxy_set_header X-Real-IP \$remote_addr;
@@ -269,7 +305,7 @@ echo "5. Collecter les fichiers statiques:"
 echo "   sudo -u $SYSTEM_USER bash -c 'cd $PROJECT_DIR && source venv/bin/activate && python manage.py collectstatic --noinput'"
 echo ""
 echo "6. Démarrer Gunicorn:"
-echo "   systemctl start gunicorn.socket"
+echo "   systemctl start gunicorn.socket gunicorn-events.service"
 echo ""
 echo "7. (Optionnel) Installer SSL avec Let's Encrypt:"
 echo "   certbot --nginx -d $DOMAIN -d www.$DOMAIN"